@@ -1,38 +1,101 @@
+import asyncio
+import threading
+import aiohttp
 import streamlit as st
 from langchain.agents import initialize_agent, Tool, AgentType
 from langchain.chat_models import ChatOpenAI
-from googlesearch import search
-import requests
-from bs4 import BeautifulSoup
+from page_cache import PAGE_CACHE_ERRORS, get_page_cache
+from html_extract import read_paragraphs
+from search_layer import get_search_layer
 
 
 openai_api_key=st.secrets["OPENAI_API_KEY"]
 
-#  Google Search Scraper (No API Key)
+#  Google Search Scraper (No API Key), behind the shared result cache and rate limiter
 def google_search_scraper(query):
-    search_results = []
     try:
-        for url in search(query, num_results=5):  # Get top 5 links
-            search_results.append(url)
+        search_results = get_search_layer().search(query, num_results=5)  # Get top 5 links
     except Exception as e:
         return f"Error: {str(e)}"
 
     return search_results if search_results else ["No results found."]
 
-#  Web Scraper for First Link
-def scrape_first_link(search_results):
-    if not search_results or "No results found." in search_results:
+#  Page fetching: all search results are requested at once and the first pages that come back
+#  with content are used, so one slow or blocked site cannot stall the agent
+PAGES_TO_KEEP = 2
+FETCH_TIMEOUT_SECONDS = 8
+CONNECT_TIMEOUT_SECONDS = 3
+MAX_CONNECTIONS = 20
+MAX_CONNECTIONS_PER_HOST = 4
+
+async def create_http_session():
+    return aiohttp.ClientSession(
+        headers={"User-Agent": "Mozilla/5.0"},
+        timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS, sock_connect=CONNECT_TIMEOUT_SECONDS),
+        connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS_PER_HOST, ttl_dns_cache=300),
+    )
+
+#  One event loop thread and connection pool shared by every session and rerun of the app
+@st.cache_resource
+def get_http_client():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="page-fetcher", daemon=True).start()
+    session = asyncio.run_coroutine_threadsafe(create_http_session(), loop).result()
+    return loop, session
+
+#  Run a page cache operation off the event loop; a locked or corrupt cache just means going to the network
+async def call_page_cache(method, *args):
+    try:
+        return await asyncio.to_thread(lambda: getattr(get_page_cache(), method)(*args))
+    except PAGE_CACHE_ERRORS:
         return None
 
-    first_link = search_results[0]
+#  Pages are served from the on-disk cache while fresh and revalidated with ETag / Last-Modified once stale.
+#  Otherwise the body is parsed as it streams in, and reading stops once the first paragraphs are extracted.
+async def fetch_page(session, url):
+    cached = await call_page_cache("get", url)
+    if cached and cached.is_fresh():
+        return cached.text
+    async with session.get(url, headers=cached.validators() if cached else None) as response:
+        if response.status == 304 and cached:
+            await call_page_cache("refresh", url, response.headers)
+            return cached.text
+        response.raise_for_status()
+        if "html" not in response.content_type:
+            return None  # PDFs, images and the like have no paragraphs to extract
+        html, text = await read_paragraphs(response)
+        headers = response.headers
+    await call_page_cache("put", url, headers, html, text)
+    return text
+
+#  Fetch every URL concurrently; keep the first `keep` pages with content and cancel the rest
+async def fetch_first_pages(session, urls, keep=PAGES_TO_KEEP):
+    tasks = [asyncio.ensure_future(fetch_page(session, url)) for url in urls]
+    pages = []
     try:
-        response = requests.get(first_link, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(response.text, "html.parser")
-        paragraphs = soup.find_all("p")
-        content = " ".join([p.get_text() for p in paragraphs[:5]])  # Extract first 5 paragraphs
-        return content if content else None
-    except Exception as e:
-        return None  # If scraping fails, return None
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                content = await next_done
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, LookupError):
+                continue  # A site that fails or times out is simply skipped
+            if content:
+                pages.append(content)
+                if len(pages) >= keep:
+                    break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return pages
+
+#  Web Scraper for the top search results
+def scrape_search_results(search_results):
+    if not isinstance(search_results, list) or not search_results or "No results found." in search_results:
+        return None
+
+    loop, session = get_http_client()
+    pages = asyncio.run_coroutine_threadsafe(fetch_first_pages(session, search_results), loop).result()
+    return "\n\n".join(pages) if pages else None
 
 #  Initialize AI Model
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=3000, openai_api_key=openai_api_key)  # Increase max_tokens for longer responses
@@ -40,7 +103,7 @@ llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=3000, openai_a
 #  Google Search Tool
 def smart_search_tool(query):
     search_results = google_search_scraper(query)
-    scraped_content = scrape_first_link(search_results)
+    scraped_content = scrape_search_results(search_results)
 
     if scraped_content:
         return scraped_content  # Return scraped web content
@@ -62,3 +125,8 @@ if query:
     with st.spinner("Searching..."):
         response = agent.invoke({"input": query})  
     st.write(response["output"])  #  Extract the final answer
+    metrics = get_search_layer().metrics()
+    st.caption(
+        f"Search cache hit rate {metrics['hit_rate']:.0%} ({metrics['hits']} hits, {metrics['coalesced']} shared, "
+        f"{metrics['misses']} searches) · throttled {metrics['throttled']}x, {metrics['throttle_wait_seconds']}s waiting"
+    )
@@ -0,0 +1,83 @@
+import codecs
+from html.parser import HTMLParser
+
+# Incremental <p> text extraction: markup is fed as it arrives and the caller stops reading
+# once enough paragraphs were collected, so large pages are neither fully downloaded nor parsed.
+
+PARAGRAPHS_PER_PAGE = 5
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+READ_CHUNK_BYTES = 16 * 1024
+
+# Closing one of these also ends an open paragraph (HTML lets </p> be omitted)
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "div", "dl", "fieldset", "figure", "footer",
+    "form", "header", "html", "li", "main", "nav", "ol", "section", "table", "td", "th", "ul",
+}
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+class ParagraphExtractor(HTMLParser):
+    def __init__(self, limit=PARAGRAPHS_PER_PAGE):
+        super().__init__()
+        self.limit = limit
+        self.paragraphs = []
+        self._current = None
+        self._skip_depth = 0
+
+    @property
+    def done(self):
+        return len(self.paragraphs) >= self.limit
+
+    def _close_paragraph(self):
+        if self._current is not None and not self.done:
+            text = " ".join("".join(self._current).split())
+            if text:
+                self.paragraphs.append(text)
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "p":
+            self._close_paragraph()
+            self._current = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "p" or tag in BLOCK_TAGS:
+            self._close_paragraph()
+
+    def handle_data(self, data):
+        if self._current is not None and not self._skip_depth:
+            self._current.append(data)
+
+    def text(self):
+        self._close_paragraph()
+        return " ".join(self.paragraphs)
+
+def _decoder(charset):
+    try:
+        return codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+# Read an aiohttp response body chunk by chunk until enough paragraphs were found or
+# max_bytes were read. Returns (markup read so far, paragraph text).
+async def read_paragraphs(response, limit=PARAGRAPHS_PER_PAGE, max_bytes=MAX_PAGE_BYTES):
+    decoder = _decoder(response.charset)
+    parser = ParagraphExtractor(limit)
+    markup = []
+    received = 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+        received += len(chunk)
+        piece = decoder.decode(chunk)
+        markup.append(piece)
+        parser.feed(piece)
+        if parser.done or received >= max_bytes:
+            break
+    else:
+        piece = decoder.decode(b"", final=True)
+        markup.append(piece)
+        parser.feed(piece)
+        parser.close()
+    return "".join(markup), parser.text()
@@ -0,0 +1,171 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".page_cache"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Freshness for responses that carry no Cache-Control / Expires and no Last-Modified to estimate from
+PAGE_CACHE_DEFAULT_TTL = 300
+# Heuristic freshness from Last-Modified is capped at a day, as browsers do
+HEURISTIC_TTL_LIMIT = 24 * 3600
+
+CACHE_CONTROL_PATTERN = re.compile(r"([\w-]+)\s*(?:=\s*\"?([^\",]*)\"?)?")
+
+# Raised by a locked or corrupt cache database; callers treat them as a cache miss
+PAGE_CACHE_ERRORS = (sqlite3.Error, zlib.error, UnicodeDecodeError, OSError)
+
+def parse_cache_control(value):
+    return {name.lower(): argument for name, argument in CACHE_CONTROL_PATTERN.findall(value or "")}
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+# Seconds a response may be served without revalidation, following RFC 9111 for a private cache:
+# max-age, then Expires, then 10% of the time since Last-Modified. None means "do not store".
+def freshness_lifetime(headers, now=None):
+    now = now if now is not None else time.time()
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    age_header = headers.get("Age") or ""
+    age = int(age_header) if age_header.isdigit() else 0
+    if directives.get("max-age", "").isdigit():
+        return max(0, int(directives["max-age"]) - age)
+    expires = _http_date(headers.get("Expires"))
+    if expires is not None:
+        date = _http_date(headers.get("Date")) or now
+        return max(0, expires - date - age)
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        date = _http_date(headers.get("Date")) or now
+        return min(HEURISTIC_TTL_LIMIT, max(0, (date - last_modified) / 10))
+    return PAGE_CACHE_DEFAULT_TTL
+
+class CachedPage:
+    def __init__(self, url, html, text, etag, last_modified, fresh_until):
+        self.url = url
+        self.html = html
+        self.text = text  # extracted paragraph text, so a hit skips parsing too
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh_until = fresh_until
+
+    def is_fresh(self):
+        return time.time() < self.fresh_until
+
+    # Conditional request headers for revalidating a stale page
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+# Persistent, size-bounded LRU cache of fetched pages (the compressed HTML that was read, plus the
+# extracted text) in SQLite
+class PageCache:
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, max_bytes=PAGE_CACHE_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "pages.sqlite3"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, html BLOB NOT NULL, text TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " fresh_until REAL NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_access)")
+        self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT html, text, etag, last_modified, fresh_until FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        html, text, etag, last_modified, fresh_until = row
+        page = CachedPage(url, zlib.decompress(html).decode("utf-8"), text, etag, last_modified, fresh_until)
+        with self._lock:
+            if page.is_fresh():
+                self.hits += 1
+            else:
+                self.stale += 1
+        return page
+
+    def put(self, url, headers, html, text):
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            return
+        blob = zlib.compress(html.encode("utf-8"))
+        size = len(blob) + len(text.encode("utf-8"))
+        if size > self.max_bytes // 4:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, html, text, etag, last_modified, fresh_until, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, blob, text, headers.get("ETag"), headers.get("Last-Modified"), now + lifetime, size, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    # A 304 Not Modified: the stored page is still valid, with freshness (and possibly validators) updated
+    def refresh(self, url, headers):
+        lifetime = freshness_lifetime(headers)
+        with self._lock:
+            self.revalidated += 1
+            if lifetime is None:
+                self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            else:
+                self._db.execute(
+                    "UPDATE pages SET fresh_until = ?, etag = COALESCE(?, etag),"
+                    " last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (time.time() + lifetime, headers.get("ETag"), headers.get("Last-Modified"), url),
+                )
+            self._db.commit()
+
+    # Drop least recently used pages until the cache fits in max_bytes
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+
+    def stats(self):
+        return {"hits": self.hits, "stale": self.stale, "revalidated": self.revalidated, "misses": self.misses}
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+# Opened on the first fetch and shared by all of them
+def get_page_cache():
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+    return _page_cache
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import threading
+import unicodedata
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Shared search front end: normalized queries, a TTL + LRU result cache, one upstream search for
+# concurrent identical queries, and a token bucket pacing what does go out to the search engine.
+
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", 1800))
+SEARCH_CACHE_MAX_ENTRIES = 1024
+
+# Outbound searches per second on average, with short bursts allowed
+SEARCH_RATE_PER_SECOND = float(os.getenv("SEARCH_RATE_PER_SECOND", 0.5))
+SEARCH_BURST = 3
+
+# Longest a caller queues for a token before the search is reported as throttled
+SEARCH_MAX_WAIT_SECONDS = 20
+
+# Point SEARCH_BACKEND_URL at a local stand-in (GET ?q=...&num=... returning a JSON list of URLs)
+# to run without hitting Google
+SEARCH_BACKEND_URL = os.getenv("SEARCH_BACKEND_URL")
+
+class SearchThrottled(Exception):
+    pass
+
+# Queries differing only in case, spacing, Unicode form or trailing punctuation share a cache entry
+def normalize_query(query):
+    query = unicodedata.normalize("NFKC", query).lower()
+    return " ".join(query.split()).rstrip("?!.")
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    # Take one token, sleeping until one is available; False if that would take longer than max_wait
+    def acquire(self, max_wait=SEARCH_MAX_WAIT_SECONDS):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait > max_wait:
+                self.throttled += 1
+                return False
+            # Reserve the token now (possibly going negative) so later callers queue behind this one
+            self.tokens -= 1
+            if wait:
+                self.throttled += 1
+                self.wait_seconds += wait
+        if wait:
+            time.sleep(wait)
+        return True
+
+def google_backend(query, num_results):
+    from googlesearch import search
+    return list(search(query, num_results=num_results))
+
+def http_backend(query, num_results, base_url=SEARCH_BACKEND_URL):
+    params = urllib.parse.urlencode({"q": query, "num": num_results})
+    with urllib.request.urlopen(f"{base_url}?{params}", timeout=10) as response:
+        return json.load(response)
+
+class SearchLayer:
+    def __init__(self, backend, ttl=SEARCH_CACHE_TTL_SECONDS, max_entries=SEARCH_CACHE_MAX_ENTRIES,
+                 rate=SEARCH_RATE_PER_SECOND, burst=SEARCH_BURST):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.limiter = TokenBucket(rate, burst)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._cache = OrderedDict()  # key -> (expires_at, results)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def search(self, query, num_results=5):
+        key = (normalize_query(query), num_results)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return list(future.result())
+
+        try:
+            if not self.limiter.acquire():
+                raise SearchThrottled("search rate limit reached, try again shortly")
+            results = list(self.backend(key[0], num_results))
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.ttl, results)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            future.set_result(results)
+            return list(results)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "throttled": self.limiter.throttled,
+                "throttle_wait_seconds": round(self.limiter.wait_seconds, 2),
+            }
+
+_search_layer = None
+_search_layer_lock = threading.Lock()
+
+# Shared by every session of the app, so the rate limit applies to all of its searches
+def get_search_layer():
+    global _search_layer
+    with _search_layer_lock:
+        if _search_layer is None:
+            _search_layer = SearchLayer(http_backend if SEARCH_BACKEND_URL else google_backend)
+    return _search_layer
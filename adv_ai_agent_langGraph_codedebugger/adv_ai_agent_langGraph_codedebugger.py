@@ -3,104 +3,276 @@ import langgraph.graph as lg
 from langchain_openai import ChatOpenAI  
 from langchain.schema import SystemMessage
 import os
-from typing import TypedDict, Optional
+import time
+import operator
+from typing import Annotated, TypedDict, Optional
+from pydantic import BaseModel, Field
+from langchain_core.runnables import RunnableConfig
 from dotenv import load_dotenv
+from detection import detect_errors
+from result_cache import code_hash, get_result_cache
+from project import PROJECT_ROOT, Project, ProjectError, check_project, fix_context, read_directory, read_zip, root_causes
 
 load_dotenv()
 api_key = st.secrets["OPENAI_API_KEY"]
 
 # Initialize OpenAI model
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
+LLM_MODEL = "gpt-4o-mini"
+llm = ChatOpenAI(model=LLM_MODEL, temperature=0.3)
 
 # State representation
 class DebugState(TypedDict):
     code: str
     error: Optional[str]
+    traceback: Optional[str]
+    stdout: Optional[str]
     fix_suggestion: Optional[str]
     alternative_fixes: Optional[str]
+    # Node durations shown under the fixes. Both fix nodes report theirs in the same superstep, hence the dict union
+    timings: Annotated[dict, operator.or_]
 
-# Function to extract Python errors
+# Wrap a node so its duration ends up in timings, in both the two-call and the combined graph
+def timed(name, node):
+    def wrapper(state: DebugState, config: RunnableConfig):
+        start = time.perf_counter()
+        update = node(state, config)
+        return {**update, "timings": {name: time.perf_counter() - start}}
+    return wrapper
+
+# Function to extract Python errors: static checks first, then a sandboxed run. Results are cached by code hash.
 def extract_error_message(code):
-    try:
-        exec(code)  # Runs code (unsafe for production)
-    except Exception as e:
-        return str(e)
-    return "No error detected"
+    cache = get_result_cache()
+    key = code_hash(code)
+    result = cache.get("detect", key)
+    if result is None:
+        result = detect_errors(code)
+        cache.put("detect", key, result)
+    if result["error_type"] is None:
+        return "No error detected", None, result["stdout"]
+    error_message = f"{result['error_type']}: {result['error']}"
+    if result["line"]:
+        error_message += f" (line {result['line']})"
+    return error_message, result["traceback"], result["stdout"]
 
 # Node to detect errors
 def error_detection(state: DebugState):
-    error_message = extract_error_message(state["code"])
-    return {**state, "error": error_message}  
-
-# Node to analyze error and suggest a fix
-def generate_fix(state: DebugState):
-    if state["error"] == "No error detected":
-        return {**state, "fix_suggestion": "No errors detected!"}
+    error_message, error_traceback, stdout = extract_error_message(state["code"])
+    return {"error": error_message, "traceback": error_traceback, "stdout": stdout}
 
-    prompt = f"""
+def error_context(state):
+    return f"""
     Here is a Python code snippet:
     ```
     {state["code"]}
     ```
     It throws the following error:
     ```
-    {state["error"]}
+    {state["traceback"] or state["error"]}
     ```
-    Please fix the code and explain why the fix works.
     """
-    response = llm.invoke([SystemMessage(content=prompt)])
-    return {**state, "fix_suggestion": response.content}  
 
-# Node to suggest alternative fixes
-def generate_alternative_fix(state: DebugState):
+# LLM answers depend only on the code (the error is derived from it), so they are cached by code hash too.
+# config carries the graph's callbacks, which is how streamed tokens reach the UI.
+def cached_completion(kind, code, prompt, config=None):
+    cache = get_result_cache()
+    key = f"{LLM_MODEL}:{code_hash(code)}"
+    answer = cache.get(kind, key)
+    if answer is None:
+        answer = llm.invoke([SystemMessage(content=prompt)], config).content
+        cache.put(kind, key, answer)
+    return answer
+
+# Node to analyze error and suggest a fix
+def generate_fix(state: DebugState, config: RunnableConfig):
     if state["error"] == "No error detected":
-        return {**state, "alternative_fixes": "No alternative fix needed."}
+        return {"fix_suggestion": "No errors detected!"}
 
-    prompt = f"""
-    Here is a Python code snippet:
-    ```
-    {state["code"]}
-    ```
-    It throws the following error:
-    ```
-    {state["error"]}
-    ```
-    Please suggest an alternative way to fix this issue.
-    """
-    response = llm.invoke([SystemMessage(content=prompt)])
-    return {**state, "alternative_fixes": response.content}  
+    prompt = error_context(state) + "Please fix the code and explain why the fix works.\n"
+    return {"fix_suggestion": cached_completion("fix", state["code"], prompt, config)}
+
+# Node to suggest alternative fixes. It does not read fix_suggestion, so it runs alongside suggest_fix.
+def generate_alternative_fix(state: DebugState, config: RunnableConfig):
+    if state["error"] == "No error detected":
+        return {"alternative_fixes": "No alternative fix needed."}
+
+    prompt = error_context(state) + "Please suggest an alternative way to fix this issue.\n"
+    return {"alternative_fixes": cached_completion("alternative_fix", state["code"], prompt, config)}
 
-# Build StateGraph
+class FixSuggestions(BaseModel):
+    fix_suggestion: str = Field(description="The fixed code and an explanation of why the fix works")
+    alternative_fix: str = Field(description="A different way to fix the same issue, with code")
+
+# Single-call mode: one structured completion returns both fixes. Its answers go into the same
+# cache entries as the two-call mode, so either mode reuses the other's results.
+def generate_both_fixes(state: DebugState, config: RunnableConfig):
+    if state["error"] == "No error detected":
+        return {"fix_suggestion": "No errors detected!", "alternative_fixes": "No alternative fix needed."}
+
+    cache = get_result_cache()
+    key = f"{LLM_MODEL}:{code_hash(state['code'])}"
+    fix, alternative = cache.get("fix", key), cache.get("alternative_fix", key)
+    if fix is None or alternative is None:
+        prompt = error_context(state) + "Please fix the code and explain why the fix works, then suggest an alternative way to fix this issue.\n"
+        answer = llm.with_structured_output(FixSuggestions).invoke([SystemMessage(content=prompt)], config)
+        fix, alternative = answer.fix_suggestion, answer.alternative_fix
+        cache.put("fix", key, fix)
+        cache.put("alternative_fix", key, alternative)
+    return {"fix_suggestion": fix, "alternative_fixes": alternative}
+
+# Join: the two fixes were generated side by side, so the user waited for the slower call, not for both
+def join_fixes(state: DebugState):
+    timings = state["timings"]
+    return {"timings": {"critical_path": max(timings["suggest_fix"], timings["suggest_alternative_fix"])}}
+
+# Build StateGraph: both fix branches start from detect_error and meet in join_fixes
 workflow = lg.StateGraph(DebugState)
-workflow.add_node("detect_error", error_detection)  
-workflow.add_node("suggest_fix", generate_fix)  
-workflow.add_node("suggest_alternative_fix", generate_alternative_fix)  
+workflow.add_node("detect_error", error_detection)
+workflow.add_node("suggest_fix", timed("suggest_fix", generate_fix))
+workflow.add_node("suggest_alternative_fix", timed("suggest_alternative_fix", generate_alternative_fix))
+workflow.add_node("join_fixes", join_fixes)
 
 workflow.set_entry_point("detect_error")
 workflow.add_edge("detect_error", "suggest_fix")
-workflow.add_edge("suggest_fix", "suggest_alternative_fix")
+workflow.add_edge("detect_error", "suggest_alternative_fix")
+workflow.add_edge(["suggest_fix", "suggest_alternative_fix"], "join_fixes")
+workflow.add_edge("join_fixes", lg.END)
 
 debugger_agent = workflow.compile()
 
-# Streamlit UI
-st.title(" AI Debugging Companion")
-st.write("Enter your Python code below, and the AI will analyze and suggest fixes.")
+# Same detection, then one structured LLM call for both fixes
+combined_workflow = lg.StateGraph(DebugState)
+combined_workflow.add_node("detect_error", error_detection)
+combined_workflow.add_node("suggest_fixes", timed("suggest_fixes", generate_both_fixes))
+
+combined_workflow.set_entry_point("detect_error")
+combined_workflow.add_edge("detect_error", "suggest_fixes")
+combined_workflow.add_edge("suggest_fixes", lg.END)
 
-code_input = st.text_area("Paste your Python code here:", height=200)
+combined_debugger_agent = combined_workflow.compile()
 
-if st.button("Debug Code"):
-    if code_input.strip():
-        result = debugger_agent.invoke({"code": code_input})
+# Nodes whose tokens are streamed into a panel, and the state key that panel ends up showing
+STREAMED_NODES = {"suggest_fix": "fix_suggestion", "suggest_alternative_fix": "alternative_fixes"}
 
+# Run the graph, rendering detection results as soon as they exist and fix tokens as they arrive.
+# Cached answers produce no tokens and are filled in from the final state.
+def run_debugger(agent, code, error_area, panels):
+    streamed = {node: "" for node in STREAMED_NODES}
+    result = {}
+    for mode, payload in agent.stream({"code": code}, stream_mode=["messages", "values"]):
+        if mode == "values":
+            if "error" in payload and "error" not in result:
+                render_detection(error_area, payload)
+            result = payload
+            continue
+        chunk, metadata = payload
+        node = metadata.get("langgraph_node")
+        if node in streamed and isinstance(chunk.content, str) and chunk.content:
+            streamed[node] += chunk.content
+            panels[STREAMED_NODES[node]].code(streamed[node], language="python")
+    for key, panel in panels.items():
+        panel.code(result.get(key) or "", language="python")
+    return result
+
+def render_detection(area, result):
+    with area:
         if result["error"] == "No error detected":
             st.success("✅ No errors detected in your code!")
         else:
             st.error(f"🔴 Error detected: {result['error']}")
+            if result["traceback"]:
+                with st.expander("Traceback"):
+                    st.code(result["traceback"], language="python")
+        if result["stdout"]:
+            with st.expander("Program output"):
+                st.text(result["stdout"])
+
+# Root causes sent to the LLM per project run; the rest are listed without a fix
+PROJECT_MAX_FIXES = 5
+
+# Fix for one failing file of a project. Only that file and the outlines of the modules it imports
+# are sent, and the answer is cached under that context, so unchanged failures cost no tokens.
+def project_fix(project, path, report):
+    context = fix_context(project, path)
+    prompt = f"""
+    Here are files from a Python project:
+    ```
+    {context}
+    ```
+    It fails with the following error:
+    ```
+    {report["traceback"] or report["error"]}
+    ```
+    Please fix {path} and explain why the fix works.
+    """
+    return cached_completion("project_fix", context + (report["traceback"] or report["error"]), prompt)
 
-        st.subheader("✅ Fix Suggestion:")
-        st.code(result["fix_suggestion"], language="python")
+def debug_project(files):
+    project = Project(files)
+    with st.spinner(f"Checking {len(files)} files..."):
+        reports, stats = check_project(project)
+    st.caption(
+        f"{stats['files']} files · {stats['static_checked']} statically checked · "
+        f"{stats['import_tested']} import-tested · the rest unchanged since the last run"
+    )
+    if not reports:
+        st.success("✅ No errors detected in your project!")
+        return
+
+    for i, ((path, line, error_type, error), affected) in enumerate(root_causes(reports).items()):
+        location = f"{path}, line {line}" if line else path
+        st.error(f"🔴 {location}: {error_type}: {error}")
+        others = [p for p in affected if p != path]
+        if others:
+            st.caption("Also fails to import: " + ", ".join(others))
+        report = reports.get(path) or reports[affected[0]]
+        if report["traceback"]:
+            with st.expander("Traceback"):
+                st.code(report["traceback"], language="python")
+        if path in project.files and i < PROJECT_MAX_FIXES:
+            with st.spinner(f"Suggesting a fix for {path}..."):
+                st.code(project_fix(project, path, report), language="python")
+
+# Streamlit UI
+st.title(" AI Debugging Companion")
+st.write("Enter your Python code below, and the AI will analyze and suggest fixes.")
+
+input_mode = st.radio("Debug:", ["A code snippet", "A project (zip or directory)"], horizontal=True)
+
+if input_mode == "A code snippet":
+    code_input = st.text_area("Paste your Python code here:", height=200)
+    fix_mode = st.radio("Fix generation:", ["Two parallel calls (streamed)", "One combined call"], horizontal=True)
+
+    if st.button("Debug Code"):
+        if code_input.strip():
+            agent = debugger_agent if fix_mode.startswith("Two") else combined_debugger_agent
+            error_area = st.container()
+
+            st.subheader("✅ Fix Suggestion:")
+            panels = {"fix_suggestion": st.empty()}
+
+            st.subheader(" Alternative Fix:")
+            panels["alternative_fixes"] = st.empty()
+
+            result = run_debugger(agent, code_input, error_area, panels)
+            if result.get("timings"):
+                st.caption(" · ".join(f"{name}: {seconds:.2f}s" for name, seconds in result["timings"].items()))
+        else:
+            st.warning(" Please enter some code before debugging.")
+else:
+    uploaded = st.file_uploader("Upload the project as a zip archive:", type="zip")
+    directory = st.text_input(f"...or enter a directory under {PROJECT_ROOT}:") if PROJECT_ROOT else ""
 
-        st.subheader(" Alternative Fix:")
-        st.code(result["alternative_fixes"], language="python")
-    else:
-        st.warning(" Please enter some code before debugging.")
+    if st.button("Debug Project"):
+        try:
+            if uploaded is not None:
+                files = read_zip(uploaded.getvalue())
+            elif directory.strip():
+                files = read_directory(directory.strip())
+            else:
+                files = None
+                st.warning(" Please upload a zip archive or enter a directory.")
+        except (ProjectError, OSError) as e:
+            files = None
+            st.error(f"Could not read the project: {e}")
+        if files:
+            debug_project(files)
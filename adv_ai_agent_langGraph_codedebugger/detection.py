@@ -0,0 +1,124 @@
+import ast
+import time
+import builtins
+import traceback
+import importlib.util
+from sandbox import CODE_FILENAME, get_sandbox
+
+# Tiered error detection: the cheapest check that finds a problem wins.
+#   1. compile() for syntax errors
+#   2. AST checks for names that are never defined and module-level imports that cannot be resolved
+#   3. execution in the sandbox pool, only when the static tiers find nothing
+
+# Names Python defines implicitly in modules, class bodies and methods
+IMPLICIT_NAMES = {
+    "__name__", "__file__", "__doc__", "__builtins__", "__spec__", "__loader__", "__package__",
+    "__annotations__", "__class__", "__module__", "__qualname__",
+}
+
+# Code using these can define names the AST cannot see, so the undefined-name check is skipped
+DYNAMIC_SCOPE_CALLS = {"exec", "eval", "globals", "locals", "vars", "__import__", "setattr"}
+
+def _result(tier, start, error_type=None, error=None, line=None, error_traceback=None, stdout=""):
+    return {
+        "tier": tier, "error_type": error_type, "error": error, "line": line,
+        "traceback": error_traceback, "stdout": stdout, "duration": time.perf_counter() - start,
+    }
+
+def _static_traceback(code, line, error_type, message, filename=CODE_FILENAME):
+    source = code.splitlines()[line - 1].strip() if 0 < line <= len(code.splitlines()) else ""
+    return f'  File "{filename}", line {line}\n    {source}\n{error_type}: {message}\n'
+
+# Every name bound anywhere in the module (assignments, definitions, imports, parameters, loop and
+# exception targets, ...). Scopes are deliberately merged, so this only flags names defined nowhere.
+def _bound_names(tree):
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            names.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            names.add(node.rest)
+        elif hasattr(ast, "TypeVar") and isinstance(node, (ast.TypeVar, ast.ParamSpec, ast.TypeVarTuple)):
+            names.add(node.name)
+    return names
+
+def find_undefined_name(tree):
+    if any(isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names) for node in ast.walk(tree)):
+        return None
+    loaded = [node for node in ast.walk(tree) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)]
+    if any(node.id in DYNAMIC_SCOPE_CALLS for node in loaded):
+        return None
+    known = _bound_names(tree) | set(dir(builtins)) | IMPLICIT_NAMES
+    undefined = [node for node in loaded if node.id not in known]
+    return min(undefined, key=lambda node: (node.lineno, node.col_offset)) if undefined else None
+
+# Only imports that run unconditionally when the module loads are checked. Ones under `if`, `try` or
+# inside functions may never run (platform checks, TYPE_CHECKING, optional dependencies), so they are
+# left to the sandbox run, which reports them only if they actually fail.
+# local_modules: top-level names a surrounding project provides, which are not installed anywhere
+def find_unresolved_import(tree, local_modules=()):
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            top_level = module.split(".")[0]
+            if top_level in local_modules:
+                continue
+            try:
+                found = importlib.util.find_spec(top_level) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
+                return node, top_level
+    return None
+
+def static_check(code, filename=CODE_FILENAME, local_modules=()):
+    start = time.perf_counter()
+    try:
+        tree = compile(code, filename, "exec", flags=ast.PyCF_ONLY_AST)
+        compile(tree, filename, "exec")
+    except SyntaxError as e:
+        return _result(
+            "syntax", start, type(e).__name__, str(e), e.lineno,
+            "".join(traceback.format_exception_only(type(e), e)),
+        )
+
+    unresolved = find_unresolved_import(tree, local_modules)
+    if unresolved:
+        node, module = unresolved
+        message = f"No module named '{module}'"
+        return _result(
+            "static", start, "ModuleNotFoundError", message, node.lineno,
+            _static_traceback(code, node.lineno, "ModuleNotFoundError", message, filename),
+        )
+    undefined = find_undefined_name(tree)
+    if undefined:
+        message = f"name '{undefined.id}' is not defined"
+        return _result(
+            "static", start, "NameError", message, undefined.lineno,
+            _static_traceback(code, undefined.lineno, "NameError", message, filename),
+        )
+    return None
+
+def detect_errors(code):
+    result = static_check(code)
+    if result is not None:
+        return result
+    result = get_sandbox().run(code)
+    return {**result, "tier": "runtime"}
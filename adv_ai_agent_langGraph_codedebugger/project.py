@@ -0,0 +1,307 @@
+import io
+import os
+import ast
+import copy
+import hashlib
+import zipfile
+import tokenize
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from detection import static_check
+from sandbox import SANDBOX_WORKERS, get_sandbox
+from result_cache import get_result_cache
+
+# Project mode: a zip or directory of Python files is checked module by module.
+#   1. every file gets the static checks, in sequence, with the project's own packages counted as importable
+#   2. every module whose own code and dependencies passed is imported in the sandbox, several at a time,
+#      with the project's sources served from memory
+# Results are cached under a hash of each file's content (static) or of the module and everything it
+# imports (import test), so after an edit only the changed files and their dependents are checked again.
+
+PROJECT_MAX_FILES = 500
+PROJECT_MAX_FILE_BYTES = 1024 * 1024
+
+# Directories on this machine can only be debugged from under this root; unset, only zip uploads are accepted
+PROJECT_ROOT = os.getenv("PROJECT_ROOT")
+
+SKIPPED_DIRS = {".git", ".hg", ".tox", ".nox", ".venv", "venv", "env", "__pycache__", "node_modules", "build", "dist"}
+
+# Characters of a dependency's outline sent to the LLM along with the failing module
+OUTLINE_MAX_CHARS = 4000
+
+class ProjectError(ValueError):
+    pass
+
+# Source bytes decoded the way the interpreter would (PEP 263 coding cookie, BOM, else UTF-8)
+def _decode(data):
+    encoding, _ = tokenize.detect_encoding(io.BytesIO(data).readline)
+    return data.decode(encoding, errors="replace")
+
+def _wanted(path):
+    parts = path.split("/")
+    return path.endswith(".py") and not any(part in SKIPPED_DIRS or part.startswith(".") for part in parts[:-1])
+
+# Archives usually wrap everything in one folder named after the project; that folder is not a package
+def _strip_wrapper_dir(files):
+    tops = {path.split("/")[0] for path in files}
+    if len(tops) == 1 and all("/" in path for path in files):
+        top = tops.pop()
+        if f"{top}/__init__.py" not in files:
+            return {path[len(top) + 1:]: source for path, source in files.items()}
+    return files
+
+def _check_limits(count, size, path):
+    if count > PROJECT_MAX_FILES:
+        raise ProjectError(f"the project has more than {PROJECT_MAX_FILES} Python files")
+    if size > PROJECT_MAX_FILE_BYTES:
+        raise ProjectError(f"{path} is larger than {PROJECT_MAX_FILE_BYTES // 1024} KB")
+
+# {relative path: source} for the .py files in a zip archive. Members are read, never extracted.
+def read_zip(data):
+    files = {}
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ProjectError("the upload is not a valid zip archive")
+    with archive:
+        for info in archive.infolist():
+            path = posixpath.normpath(info.filename.replace("\\", "/"))
+            if info.is_dir() or path.startswith(("/", "../")) or not _wanted(path):
+                continue
+            _check_limits(len(files) + 1, info.file_size, path)
+            files[path] = _decode(archive.read(info))
+    if not files:
+        raise ProjectError("no Python files found in the archive")
+    return _strip_wrapper_dir(files)
+
+def _inside(path, root):
+    return os.path.commonpath([path, root]) == root
+
+# {relative path: source} for the .py files under `directory`, which is relative to (or must be inside)
+# `project_root`. Symlinks leading out of the root are skipped.
+def read_directory(directory, project_root=PROJECT_ROOT):
+    if not project_root:
+        raise ProjectError("reading directories is disabled; set PROJECT_ROOT to allow it")
+    project_root = os.path.realpath(project_root)
+    root = os.path.realpath(os.path.join(project_root, directory))
+    if not _inside(root, project_root):
+        raise ProjectError(f"{directory} is outside {project_root}")
+    if not os.path.isdir(root):
+        raise ProjectError(f"{directory} is not a directory")
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS and not d.startswith("."))
+        for filename in sorted(filenames):
+            if not filename.endswith(".py"):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            if not _inside(os.path.realpath(full_path), project_root):
+                continue
+            path = os.path.relpath(full_path, root).replace(os.sep, "/")
+            _check_limits(len(files) + 1, os.path.getsize(full_path), path)
+            with open(full_path, "rb") as f:
+                files[path] = _decode(f.read())
+    if not files:
+        raise ProjectError(f"no Python files found in {directory}")
+    return files
+
+# "pkg/mod.py" -> ("pkg.mod", False), "pkg/__init__.py" -> ("pkg", True); a src/ layout is unwrapped
+def module_name(path):
+    parts = path[:-len(".py")].split("/")
+    if parts[0] == "src" and len(parts) > 1:
+        parts = parts[1:]
+    if parts[-1] == "__init__":
+        return ".".join(parts[:-1]), True
+    return ".".join(parts), False
+
+def content_hash(source):
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+class Project:
+    def __init__(self, files):
+        self.files = files
+        self.modules = {}  # module name -> path
+        self.packages = set()
+        for path in sorted(files):
+            name, is_package = module_name(path)
+            if not name or not all(part.isidentifier() for part in name.split(".")):
+                continue
+            self.modules[name] = path
+            if is_package:
+                self.packages.add(name)
+        self.paths = {path: name for name, path in self.modules.items()}
+        self.top_level = sorted({name.split(".")[0] for name in self.modules})
+        self.hashes = {path: content_hash(source) for path, source in files.items()}
+        self.imports = {name: self._project_imports(name) for name in self.modules}
+
+    # Project modules executed when name is imported: its parent packages and everything it imports
+    def _project_imports(self, name):
+        imported = {parent for parent in _prefixes(name) if parent in self.modules and parent != name}
+        try:
+            tree = ast.parse(self.files[self.modules[name]])
+        except SyntaxError:
+            return imported
+        package = name if name in self.packages else name.rpartition(".")[0]
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                targets = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    base = package.split(".")[:len(package.split(".")) - node.level + 1] if package else []
+                    base = ".".join(base + ([node.module] if node.module else []))
+                else:
+                    base = node.module
+                if not base:
+                    continue
+                targets = [base] + [f"{base}.{alias.name}" for alias in node.names if alias.name != "*"]
+            else:
+                continue
+            for target in targets:
+                imported.update(prefix for prefix in _prefixes(target) if prefix in self.modules)
+        imported.discard(name)
+        return imported
+
+    # The module and every project module it transitively imports
+    def closure(self, name):
+        seen, stack = set(), [name]
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.imports[current])
+        return seen
+
+    def sandbox_modules(self, names):
+        return {
+            name: (self.modules[name], self.files[self.modules[name]], name in self.packages)
+            for name in names
+        }
+
+def _prefixes(dotted):
+    parts = dotted.split(".")
+    return [".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+def _key(*parts):
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def _static_key(project, path):
+    return _key(path, project.hashes[path], *project.top_level)
+
+def _import_key(project, name):
+    closure = sorted(project.closure(name))
+    return _key(name, *(f"{project.modules[n]}:{project.hashes[project.modules[n]]}" for n in closure))
+
+def _static_report(project, path):
+    result = static_check(project.files[path], filename=path, local_modules=project.top_level)
+    if result is None:
+        return None
+    return {**result, "file": path}
+
+def _import_report(project, name):
+    result = get_sandbox().run(f"import {name}", project.sandbox_modules(project.closure(name)))
+    return {**result, "tier": "import"} if result["error_type"] else None
+
+# Look results up by key, computing the missing ones on `workers` threads (in sequence for one worker).
+# Returns ({item: result}, items computed)
+def _cached_map(namespace, items, key, compute, workers=1):
+    cache = get_result_cache()
+    results, missing = {}, []
+    for item in items:
+        entry = cache.get(namespace, key(item))
+        if entry is None:
+            missing.append(item)
+        else:
+            results[item] = entry["result"]
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        computed = executor.map(compute, missing) if executor else map(compute, missing)
+        for item, result in zip(missing, computed):
+            cache.put(namespace, key(item), {"result": result})
+            results[item] = result
+    finally:
+        if executor:
+            executor.shutdown()
+    return results, missing
+
+# Check every file. Returns per-path reports for the files with errors (the report's "file" is where the
+# error was raised, which for an import failure can be a dependency) and counts of the work done.
+def check_project(project):
+    paths = sorted(project.files)
+    # The static checks are pure-Python CPU work that threads would only serialize on the GIL
+    static, static_checked = _cached_map(
+        "project_static", paths, lambda path: _static_key(project, path),
+        lambda path: _static_report(project, path),
+    )
+    # Only modules whose whole import closure is statically clean are worth importing
+    broken = {project.paths[path] for path, report in static.items() if report and path in project.paths}
+    importable = sorted(name for name in project.modules if not project.closure(name) & broken)
+    imports, import_tested = _cached_map(
+        "project_import", importable, lambda name: _import_key(project, name),
+        lambda name: _import_report(project, name), SANDBOX_WORKERS,
+    )
+
+    reports = {path: report for path, report in static.items() if report}
+    for name, report in imports.items():
+        if report:
+            reports[project.modules[name]] = report
+    for name in project.modules:
+        path = project.modules[name]
+        if path not in reports and project.closure(name) & broken:
+            cause = min(project.modules[n] for n in project.closure(name) & broken)
+            reports[path] = {**reports[cause], "tier": "blocked"}
+    stats = {
+        "files": len(paths),
+        "static_checked": len(static_checked),
+        "import_tested": len(import_tested),
+        "errors": len(reports),
+    }
+    return dict(sorted(reports.items())), stats
+
+# Failures grouped by where they were raised: {(file, line, error_type, error): [affected paths]}
+def root_causes(reports):
+    causes = {}
+    for path, report in reports.items():
+        cause = (report["file"] or path, report["line"], report["error_type"], report["error"])
+        causes.setdefault(cause, []).append(path)
+    return causes
+
+# A module's interface without its bodies: imports, signatures, class layouts and short assignments
+def module_outline(source):
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    lines = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            lines.append(ast.unparse(_stub(node)))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            text = ast.unparse(node)
+            lines.append(text if len(text) <= 120 else text[:117] + "...")
+    outline = "\n".join(lines)
+    return outline if len(outline) <= OUTLINE_MAX_CHARS else outline[:OUTLINE_MAX_CHARS] + "\n..."
+
+def _stub(node):
+    stub = copy.copy(node)
+    if isinstance(node, ast.ClassDef):
+        members = [
+            _stub(child) if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) else child
+            for child in node.body if not isinstance(child, ast.Expr)
+        ]
+        stub.body = members or [ast.Expr(ast.Constant(...))]
+    else:
+        stub.body = [ast.Expr(ast.Constant(...))]
+    return stub
+
+# What the LLM needs to fix a failing file: its full source and the outlines of the project modules
+# it imports. Files elsewhere in the project are left out.
+def fix_context(project, path):
+    parts = [f"# File: {path}\n{project.files[path]}"]
+    name = project.paths.get(path)
+    for dependency in sorted(project.imports.get(name, ())):
+        outline = module_outline(project.files[project.modules[dependency]])
+        if outline:
+            parts.append(f"# Interface of {project.modules[dependency]} (bodies omitted)\n{outline}")
+    return "\n\n".join(parts)
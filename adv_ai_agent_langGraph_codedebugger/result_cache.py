@@ -0,0 +1,59 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+# Process-wide LRU of detection results and LLM fix suggestions, keyed by a hash of the normalized
+# code, so a resubmitted snippet neither starts a sandbox run nor calls the LLM again.
+
+RESULT_CACHE_MAX_ENTRIES = 2048
+
+# Line endings and blank lines at the end do not change what code does. Whitespace within lines is kept:
+# it can matter after a backslash continuation or inside a multi-line string.
+def normalize_code(code):
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return "\n".join(lines)
+
+def code_hash(code):
+    return hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = Counter()
+        self.misses = Counter()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            value = self._entries.get((namespace, key))
+            if value is None:
+                self.misses[namespace] += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits[namespace] += 1
+            return value
+
+    def put(self, namespace, key, value):
+        with self._lock:
+            self._entries[(namespace, key)] = value
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {ns: {"hits": self.hits[ns], "misses": self.misses[ns]} for ns in namespaces}
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+# Opened on the first lookup
+def get_result_cache():
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+    return _result_cache
@@ -0,0 +1,281 @@
+import io
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import signal
+import linecache
+import threading
+import traceback
+import contextlib
+import subprocess
+import importlib.abc
+import importlib.util
+
+try:
+    import resource
+except ImportError:  # Windows: only the wall-clock limit applies
+    resource = None
+
+# User code runs in a pool of pre-started worker processes instead of the Streamlit server.
+# Each run is bounded by CPU time, wall-clock time and memory; a worker that crashes, hangs or
+# runs out of budget is killed and replaced in the background.
+#
+# Workers are plain interpreters running this file, exchanging one JSON message per line over
+# stdin/stdout. (multiprocessing would re-run the Streamlit app script in every child, since
+# Streamlit installs the script as __main__, and JSON keeps user code from sending the server pickles.)
+
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", 2))
+SANDBOX_CPU_SECONDS = int(os.getenv("SANDBOX_CPU_SECONDS", 5))
+SANDBOX_WALL_SECONDS = float(os.getenv("SANDBOX_WALL_SECONDS", 10))
+SANDBOX_MEMORY_BYTES = int(os.getenv("SANDBOX_MEMORY_BYTES", 512 * 1024 * 1024))
+
+# Workers are retired after this many runs, since user code can leave state behind in the process
+SANDBOX_RUNS_PER_WORKER = 50
+
+# Output kept from one run
+SANDBOX_STDOUT_LIMIT = 64 * 1024
+
+CODE_FILENAME = "<user_code>"
+
+# Imported once per worker so snippets using them do not pay the import cost
+WARM_IMPORTS = ("collections", "datetime", "functools", "itertools", "json", "math", "random", "re", "string")
+
+class _CappedWriter(io.StringIO):
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.truncated = False
+
+    def write(self, text):
+        room = self.limit - self.tell()
+        if len(text) > room:
+            self.truncated = True
+            text = text[:max(room, 0)]
+        return super().write(text)
+
+# Serves a project's modules from memory: {module name: (filename, source, is_package)}.
+# Packages that only exist as directories are importable as empty packages.
+class _ProjectFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, modules):
+        self.modules = dict(modules)
+        for name in list(self.modules):
+            parts = name.split(".")
+            for i in range(1, len(parts)):
+                self.modules.setdefault(".".join(parts[:i]), (None, "", True))
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in self.modules:
+            return None
+        filename, _, is_package = self.modules[fullname]
+        return importlib.util.spec_from_loader(fullname, self, origin=filename, is_package=is_package)
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        filename, source, _ = self.modules[module.__name__]
+        if filename is not None:
+            module.__file__ = filename
+        exec(compile(source, filename or module.__name__, "exec"), module.__dict__)
+
+# Traceback starting at the first frame of the user's code, with its source lines. Frames of the
+# import machinery and of this file, which sit between user frames during project imports, are dropped.
+def _format_user_traceback(error, filenames):
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename not in filenames:
+        tb = tb.tb_next
+    frames = [
+        frame for frame in traceback.extract_tb(tb)
+        if not frame.filename.startswith("<frozen importlib") and frame.filename != __file__
+    ]
+    lines = traceback.format_list(frames)
+    if lines:
+        lines.insert(0, "Traceback (most recent call last):\n")
+    return "".join(lines + traceback.format_exception_only(type(error), error))
+
+# (filename, line) of the innermost user frame, or of the offending line for a syntax error
+def _error_location(error, filenames):
+    if isinstance(error, SyntaxError) and error.filename in filenames:
+        return error.filename, error.lineno
+    frames = [frame for frame in traceback.extract_tb(error.__traceback__) if frame.filename in filenames]
+    return (frames[-1].filename, frames[-1].lineno) if frames else (None, None)
+
+def _record_error(result, error, filenames):
+    filename, line = _error_location(error, filenames)
+    result.update(
+        error=str(error) or type(error).__name__,
+        error_type=type(error).__name__,
+        traceback=_format_user_traceback(error, filenames),
+        line=line,
+        file=filename,
+    )
+
+# Run code, optionally with a project's modules importable; returns the error (if any) and output
+def execute(code, modules=None):
+    modules = modules or {}
+    sources = {CODE_FILENAME: code}
+    sources.update((filename, source) for filename, source, _ in modules.values() if filename)
+    for filename, source in sources.items():
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    finder = _ProjectFinder(modules) if modules else None
+    if finder is not None:
+        sys.meta_path.insert(0, finder)
+
+    stdout = _CappedWriter(SANDBOX_STDOUT_LIMIT)
+    result = {"error": None, "error_type": None, "traceback": None, "line": None, "file": None}
+    start = time.perf_counter()
+    try:
+        compiled = compile(code, CODE_FILENAME, "exec")
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stdout):
+            exec(compiled, {"__name__": "__main__", "__builtins__": __builtins__})
+    except SystemExit as e:
+        # exit(), sys.exit(0) and sys.exit(main()) with main() returning 0 are a normal finish
+        if e.code not in (None, 0):
+            _record_error(result, e, sources)
+    except BaseException as e:
+        _record_error(result, e, sources)
+    finally:
+        # The next run must not see this project's modules
+        if finder is not None:
+            sys.meta_path.remove(finder)
+            for name in finder.modules:
+                sys.modules.pop(name, None)
+    result["stdout"] = stdout.getvalue() + ("\n[output truncated]" if stdout.truncated else "")
+    result["duration"] = time.perf_counter() - start
+    return result
+
+def _worker_main(cpu_seconds, memory_bytes):
+    # Keep the protocol on private descriptors; user code gets /dev/null for fds 0-2
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    for name in WARM_IMPORTS:
+        __import__(name)
+    if resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    for line in requests:
+        request = json.loads(line)
+        if resource is not None:
+            # RLIMIT_CPU counts the whole process lifetime, so move the soft limit for each run;
+            # going over it kills the worker with SIGXCPU
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            soft = int(used.ru_utime + used.ru_stime) + cpu_seconds + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+        responses.write(json.dumps(execute(request["code"], request.get("modules"))) + "\n")
+        responses.flush()
+
+class SandboxWorker:
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(SANDBOX_CPU_SECONDS), str(SANDBOX_MEMORY_BYTES)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8",
+        )
+        self.results = queue.Queue()
+        self.runs = 0
+        threading.Thread(target=self._read_results, daemon=True).start()
+
+    # None marks the end of the stream: the worker exited or wrote something that is not a result
+    def _read_results(self):
+        try:
+            for line in self.process.stdout:
+                self.results.put(json.loads(line))
+        except ValueError:
+            pass
+        self.results.put(None)
+
+    def send(self, code, modules=None):
+        self.process.stdin.write(json.dumps({"code": code, "modules": modules}) + "\n")
+        self.process.stdin.flush()
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait(timeout=5)
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+# Fixed-size pool of warm workers. A run that times out or kills its worker gets an error result,
+# and the worker is replaced off the request path.
+class SandboxPool:
+    def __init__(self, size=SANDBOX_WORKERS, wall_seconds=SANDBOX_WALL_SECONDS):
+        self.size = size
+        self.wall_seconds = wall_seconds
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(SandboxWorker())
+
+    def _replace(self, worker):
+        worker.stop()
+        if not self._closed:
+            threading.Thread(target=lambda: self._idle.put(SandboxWorker()), daemon=True).start()
+
+    # Run code in an idle worker; returns the dict built by execute()
+    def run(self, code, modules=None):
+        worker = self._idle.get()
+        start = time.perf_counter()
+        healthy = False
+        try:
+            worker.send(code, modules)
+            result = worker.results.get(timeout=self.wall_seconds)
+            healthy = result is not None
+        except queue.Empty:
+            result = _failure("TimeoutError", f"execution took longer than {self.wall_seconds:g} seconds", start)
+        except OSError:
+            result = None
+        if result is None:
+            try:
+                exitcode = worker.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                exitcode = None
+            result = _failure("WorkerCrashed", _describe_exit(exitcode), start)
+        worker.runs += 1
+        if not healthy or worker.runs >= SANDBOX_RUNS_PER_WORKER:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def close(self):
+        self._closed = True
+        while not self._idle.empty():
+            self._idle.get_nowait().stop()
+
+def _failure(error_type, message, start):
+    return {
+        "error": message, "error_type": error_type, "traceback": None, "line": None, "file": None,
+        "stdout": "", "duration": time.perf_counter() - start,
+    }
+
+def _describe_exit(exitcode):
+    if exitcode is None:
+        return "the sandbox process stopped responding"
+    if hasattr(signal, "SIGXCPU") and exitcode == -signal.SIGXCPU:
+        return f"CPU time limit of {SANDBOX_CPU_SECONDS} seconds exceeded"
+    if exitcode < 0:
+        return f"the sandbox process was killed by signal {-exitcode}"
+    return f"the sandbox process exited with code {exitcode}"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Workers are started on first use and stopped when the interpreter exits
+def get_sandbox():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool(SANDBOX_WORKERS)
+            atexit.register(_pool.close)
+    return _pool
+
+if __name__ == "__main__":
+    _worker_main(int(sys.argv[1]), int(sys.argv[2]))
@@ -1,4 +1,3 @@
-import json
 import streamlit as st
 from typing import TypedDict
 from langgraph.graph import StateGraph, END
@@ -6,14 +5,11 @@ import openai
 import os
 from dotenv import load_dotenv
 from io import BytesIO
-from docx import Document
-from pptx import Presentation
-import pdfplumber
-import pandas as pd
-from bs4 import BeautifulSoup
-import mimetypes
-import tempfile
-import pypandoc
+from extractors import EXTRACTOR_VERSION, UNSUPPORTED_FILE_MESSAGE, UnsupportedFileType, iter_text_pieces
+from summarizer import SUMMARY_VERSION, summarize_chunks
+from chunker import CHUNKER_VERSION, PIECE_SEPARATOR, chunk_text, iter_text_chunks
+from doc_cache import PieceRecorder, cache_key, file_digest, get_document_cache
+from retrieval import ChunkIndex, load_index, save_index
 
 # Load environment variables
 load_dotenv()
@@ -25,99 +21,92 @@ class DocumentState(TypedDict):
     file_type: str
     summary: str
     chunks: list
+    document_key: str
     message: str
 
+class QuestionState(TypedDict):
+    document_key: str
+    question: str
+    context: list
+    answer: str
+
+# Number of chunks sent to the LLM when answering a question
+RETRIEVAL_TOP_K = 5
+
 # Initialize LangGraph with a state schema
 upload_graph = StateGraph(state_schema=DocumentState)
-
-# File extraction functions
-
-def extract_text_from_pdf(file):
-    text = ""
-    with pdfplumber.open(BytesIO(file.read())) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-    return text.strip()
-
-def extract_text_from_doc(file, file_type):
-    if file_type == "docx":
-        doc = Document(BytesIO(file.read()))
-        return "\n".join([para.text for para in doc.paragraphs])
-    elif file_type == "doc":
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".doc") as temp_doc:
-            temp_doc.write(file.read())
-            temp_doc_path = temp_doc.name
-        temp_docx_path = temp_doc_path + "x"
-        try:
-            pypandoc.convert_file(temp_doc_path, "docx", outputfile=temp_docx_path)
-            doc = Document(temp_docx_path)
-            return "\n".join([para.text for para in doc.paragraphs])
-        finally:
-            os.remove(temp_doc_path)
-            if os.path.exists(temp_docx_path):
-                os.remove(temp_docx_path)
-    else:
-        return ""
-
-def extract_text_from_pptx(file):
-    prs = Presentation(BytesIO(file.read()))
-    return "\n".join([
-        shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")
-    ]).strip()
-
-def extract_text_from_txt(file):
-    return file.read().decode("utf-8").strip()
-
-def extract_text_from_html(file):
-    soup = BeautifulSoup(file, "html.parser")
-    return soup.get_text().strip()
-
-def extract_text_from_any_file(uploaded_file):
-    file_type, _ = mimetypes.guess_type(uploaded_file.name)
-    
-    extractors = {
-        "application/pdf": extract_text_from_pdf,
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document": extract_text_from_doc,
-        "application/msword": extract_text_from_doc,
-        "text/plain": extract_text_from_txt,
-        "text/html": extract_text_from_html,
-        "application/vnd.ms-powerpoint": extract_text_from_pptx,
-        "application/vnd.openxmlformats-officedocument.presentationml.presentation": extract_text_from_pptx,
-        "application/json": lambda file: json.load(file),
-        "text/csv": lambda file: pd.read_csv(file).to_string(),
-    }
-    
-    if file_type in extractors:
-        return extractors[file_type](uploaded_file, uploaded_file.name.split('.')[-1].lower())
-    return "Unsupported file type. Please upload a document or readable file."
-
-def chunk_text(text, chunk_size=500):
-    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
-
-def summarize_large_text(text, chunk_size=2000):
-    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
-    summaries = []
-    for chunk in chunks:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": f"Summarize the following document:\n\n{chunk}"}
-            ],
-            max_tokens=500
-        )
-        summaries.append(response['choices'][0]['message']['content'].strip())
-    return " ".join(summaries)
+qa_graph = StateGraph(state_schema=QuestionState)
+
+# Chunk, index and summarize text while it is still being produced.
+# Chunk summaries run concurrently as soon as each chunk is available, then get reduced into one summary.
+# Each summary chunk is split again into the smaller, overlapping chunks used for retrieval.
+def process_text_stream(pieces, index=None):
+    chunks = []
+    def summary_chunks():
+        for chunk in iter_text_chunks(pieces):
+            new_chunks = chunk_text(chunk)
+            chunks.extend(new_chunks)
+            if index is not None:
+                index.add(new_chunks)
+            yield chunk
+    summary = summarize_chunks(summary_chunks())
+    return chunks, summary
 
 # Define LangGraph nodes
+# Extracted text, chunks and summary are cached by content hash, so reruns and repeat uploads skip all work
 def upload_document(state: DocumentState):
     uploaded_file = state["uploaded_file"]
-    text = extract_text_from_any_file(uploaded_file)
-    if not text:
-        return {"summary": "", "chunks": [], "message": "No text extracted from the document."}
-    chunks = chunk_text(text)
-    summary = summarize_large_text(text)
-    return {"summary": summary, "chunks": chunks, "message": "Document processed successfully!"}
+    cache = get_document_cache()
+    text_key = cache_key(file_digest(uploaded_file), EXTRACTOR_VERSION)
+    chunks_key = cache_key(text_key, CHUNKER_VERSION)
+    summary_key = cache_key(chunks_key, SUMMARY_VERSION)
+
+    chunks = cache.get("chunks", chunks_key)
+    summary = cache.get("summary", summary_key)
+    if chunks is None or summary is None:
+        index = ChunkIndex()
+        text = cache.get("text", text_key)
+        if text is None:
+            # Text too large for the cache is not kept in memory either
+            recorder = PieceRecorder(cache.max_value_bytes)
+            try:
+                chunks, summary = process_text_stream(recorder.record(iter_text_pieces(uploaded_file)), index=index)
+            except UnsupportedFileType:
+                return {"summary": "", "chunks": [], "document_key": chunks_key, "message": UNSUPPORTED_FILE_MESSAGE}
+            if recorder.pieces is not None:
+                cache.put("text", text_key, PIECE_SEPARATOR.join(recorder.pieces))
+        else:
+            chunks, summary = process_text_stream([text] if text else [], index=index)
+        cache.put("chunks", chunks_key, chunks)
+        cache.put("summary", summary_key, summary)
+        save_index(chunks_key, index)
+
+    if not chunks:
+        return {"summary": "", "chunks": [], "document_key": chunks_key, "message": "No text extracted from the document."}
+    return {"summary": summary, "chunks": chunks, "document_key": chunks_key, "message": "Document processed successfully!"}
+
+# Look up the chunks most relevant to the question in the document's index
+def retrieve_chunks(state: QuestionState):
+    index = load_index(state["document_key"])
+    if index is None:
+        return {"context": []}
+    hits = index.search(state["question"], k=RETRIEVAL_TOP_K)
+    return {"context": [index.chunks[chunk_id] for chunk_id, _ in hits]}
+
+# Answer from the retrieved chunks only, instead of resending the whole document
+def answer_question(state: QuestionState):
+    if not state["context"]:
+        return {"answer": "No relevant passages were found in the document."}
+    context = "\n\n---\n\n".join(state["context"])
+    response = openai.ChatCompletion.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant. Answer using only the provided document excerpts."},
+            {"role": "user", "content": f"Document excerpts:\n\n{context}\n\nQuestion: {state['question']}"}
+        ],
+        max_tokens=500
+    )
+    return {"answer": response['choices'][0]['message']['content'].strip()}
 
 # Add nodes to the upload graph
 upload_graph.add_node("upload_document", upload_document)
@@ -125,6 +114,13 @@ upload_graph.set_entry_point("upload_document")
 upload_graph.add_edge("upload_document", END)
 upload_app = upload_graph.compile()
 
+qa_graph.add_node("retrieve_chunks", retrieve_chunks)
+qa_graph.add_node("answer_question", answer_question)
+qa_graph.set_entry_point("retrieve_chunks")
+qa_graph.add_edge("retrieve_chunks", "answer_question")
+qa_graph.add_edge("answer_question", END)
+qa_app = qa_graph.compile()
+
 def main():
     st.title("Document Upload and Summarization System with LangGraph")
     
@@ -133,8 +129,23 @@ def main():
     if uploaded_file:
         state = {"uploaded_file": uploaded_file}
         result = upload_app.invoke(state)
+        if not result["chunks"]:
+            st.warning(result["message"])
+            return
         st.subheader("Document Summary")
         st.write(result["summary"])
+        cache = get_document_cache()
+        stage_stats = ", ".join(
+            f"{namespace} {counts['hits']} hits / {counts['misses']} misses"
+            for namespace, counts in cache.stats().items()
+        )
+        st.caption(f"Cache: {stage_stats} ({cache.total_bytes() / 2**20:.1f} of {cache.max_bytes / 2**20:.0f} MB used)")
+
+        question = st.text_input("Ask a question about the document")
+        if question and result["chunks"]:
+            answer = qa_app.invoke({"document_key": result["document_key"], "question": question})
+            st.subheader("Answer")
+            st.write(answer["answer"])
 
 if __name__ == "__main__":
     main()
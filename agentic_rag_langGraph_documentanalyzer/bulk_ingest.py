@@ -0,0 +1,223 @@
+import os
+import json
+import asyncio
+import tarfile
+import zipfile
+import argparse
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import openai
+from dotenv import load_dotenv
+import extractors
+import doc_converter
+from extractors import EXTRACTOR_VERSION, is_supported_file, iter_text_pieces
+from chunker import CHUNKER_VERSION, PIECE_SEPARATOR, chunk_text, iter_text_chunks
+from summarizer import SUMMARY_MAX_CONCURRENCY, SUMMARY_VERSION, map_reduce_summarize
+from doc_cache import PieceRecorder, cache_key, file_digest, get_document_cache
+from retrieval import ChunkIndex, save_index
+
+# Headless batch ingestion: extract, chunk, index and summarize every supported file in a
+# directory or archive, streaming one JSON line per file and checkpointing finished files.
+#
+#   python bulk_ingest.py /shares/contracts --output contracts.jsonl
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Documents extracted or being summarized at once; bounds memory independently of the share size
+DEFAULT_DOCUMENTS_IN_FLIGHT = DEFAULT_WORKERS * 4
+
+# Enumerate (source_id, source) pairs. Directory and zip members are opened by the worker;
+# tar members can only be read sequentially, so their bytes are read here.
+def iter_sources(root):
+    if os.path.isdir(root):
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if is_supported_file(path):
+                    yield os.path.relpath(path, root), ("path", path)
+    elif zipfile.is_zipfile(root):
+        with zipfile.ZipFile(root) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and is_supported_file(info.filename):
+                    yield info.filename, ("zip", root, info.filename)
+    elif tarfile.is_tarfile(root):
+        with tarfile.open(root) as archive:
+            for member in archive:
+                if member.isfile() and is_supported_file(member.name):
+                    yield member.name, ("bytes", member.name, archive.extractfile(member).read())
+    else:
+        raise ValueError(f"{root} is not a directory, zip or tar archive")
+
+def open_source(source):
+    if source[0] == "path":
+        return open(source[1], "rb")
+    if source[0] == "zip":
+        with zipfile.ZipFile(source[1]) as archive:
+            data = archive.read(source[2])
+        name = source[2]
+    else:
+        _, name, data = source
+    file = BytesIO(data)
+    file.name = name
+    return file
+
+def init_worker():
+    # One file per core already keeps the machine busy; don't fan PDFs out to a second pool,
+    # and give each worker a single warm .doc converter
+    extractors.PDF_PARALLEL = False
+    doc_converter.DOC_CONVERTER_WORKERS = 1
+
+# Runs in a worker process: extract (or reuse cached) text, stream it through the chunker and build the
+# document's index here, so only the summary chunks are sent back to the parent process
+def extract_and_chunk(source):
+    cache = get_document_cache()
+    index = ChunkIndex()
+    summary_chunks = []
+    with open_source(source) as file:
+        digest = file_digest(file)
+        text_key = cache_key(digest, EXTRACTOR_VERSION)
+        chunks_key = cache_key(text_key, CHUNKER_VERSION)
+        text = cache.get("text", text_key)
+        recorder = None
+        if text is None:
+            recorder = PieceRecorder(cache.max_value_bytes)
+            pieces = recorder.record(iter_text_pieces(file))
+        else:
+            pieces = [text] if text else []
+        for summary_chunk in iter_text_chunks(pieces):
+            summary_chunks.append(summary_chunk)
+            index.add(chunk_text(summary_chunk))
+    if recorder is not None and recorder.pieces is not None:
+        cache.put("text", text_key, PIECE_SEPARATOR.join(recorder.pieces))
+    cache.put("chunks", chunks_key, index.chunks)
+    save_index(chunks_key, index, keep_loaded=False)
+    return {"sha256": digest, "document_key": chunks_key, "summary_chunks": summary_chunks, "chunk_count": len(index)}
+
+def create_worker_pool(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker
+    )
+
+# Process pool that replaces itself when a worker dies (OOM, segfault), instead of failing every later file.
+# A crash fails every file in flight, so each of them is retried once in a worker of its own,
+# where only the file that actually crashes fails again.
+class ExtractionPool:
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = create_worker_pool(workers)
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # Other files that failed with the same pool find it already replaced
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = create_worker_pool(self.workers)
+        retry_pool = create_worker_pool(1)
+        try:
+            return await loop.run_in_executor(retry_pool, func, *args)
+        finally:
+            retry_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+async def ingest_document(source_id, source, pool, llm_semaphore):
+    try:
+        extracted = await pool.run(extract_and_chunk, source)
+    except BrokenProcessPool:
+        return {"source": source_id, "error": "extraction failed: worker process crashed"}
+    except Exception as e:
+        return {"source": source_id, "error": f"extraction failed: {e}"}
+
+    cache = get_document_cache()
+    chunks_key = extracted["document_key"]
+    summary_key = cache_key(chunks_key, SUMMARY_VERSION)
+    summary = cache.get("summary", summary_key)
+    if summary is None:
+        try:
+            summary = await map_reduce_summarize(extracted["summary_chunks"], semaphore=llm_semaphore)
+        except Exception as e:
+            return {"source": source_id, "sha256": extracted["sha256"], "error": f"summarization failed: {e}"}
+        cache.put("summary", summary_key, summary)
+    return {
+        "source": source_id,
+        "sha256": extracted["sha256"],
+        "document_key": chunks_key,
+        "chunk_count": extracted["chunk_count"],
+        "summary": summary,
+    }
+
+async def ingest(root, output_path, checkpoint_path, workers=DEFAULT_WORKERS,
+                 llm_concurrency=SUMMARY_MAX_CONCURRENCY, documents_in_flight=DEFAULT_DOCUMENTS_IN_FLIGHT):
+    done = load_checkpoint(checkpoint_path)
+    llm_semaphore = asyncio.Semaphore(llm_concurrency)
+    slots = asyncio.Semaphore(documents_in_flight)
+    pool = ExtractionPool(workers)
+    counts = {"processed": 0, "failed": 0, "skipped": 0}
+
+    with open(output_path, "a", encoding="utf-8") as output, open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        async def run(source_id, source):
+            try:
+                record = await ingest_document(source_id, source, pool, llm_semaphore)
+            finally:
+                slots.release()
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            # Failed files are not checkpointed, so the next run retries them
+            if "error" in record:
+                counts["failed"] += 1
+            else:
+                checkpoint.write(source_id + "\n")
+                checkpoint.flush()
+                counts["processed"] += 1
+
+        tasks = set()
+        try:
+            for source_id, source in iter_sources(root):
+                if source_id in done:
+                    counts["skipped"] += 1
+                    continue
+                await slots.acquire()
+                task = asyncio.create_task(run(source_id, source))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            pool.shutdown()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract, index and summarize a directory or archive of documents.")
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz) archive to ingest")
+    parser.add_argument("--output", default="ingest_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="File listing finished sources (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Extraction processes")
+    parser.add_argument("--llm-concurrency", type=int, default=SUMMARY_MAX_CONCURRENCY, help="Concurrent LLM calls")
+    parser.add_argument("--documents-in-flight", type=int, default=DEFAULT_DOCUMENTS_IN_FLIGHT,
+                        help="Documents extracted or summarized at once")
+    args = parser.parse_args()
+
+    load_dotenv()
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    counts = asyncio.run(ingest(
+        args.source, args.output, args.checkpoint or f"{args.output}.checkpoint",
+        args.workers, args.llm_concurrency, args.documents_in_flight,
+    ))
+    print(f"Processed {counts['processed']}, failed {counts['failed']}, skipped {counts['skipped']} (already done)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import re
+import threading
+import tiktoken
+
+# Bump whenever chunk boundaries change so cached chunks and summaries are not reused
+CHUNKER_VERSION = "2"
+
+# gpt-4o-mini tokenizer
+TOKEN_ENCODING = "o200k_base"
+
+# Token budgets: large chunks for the map step of the summarizer, small overlapping ones for retrieval
+SUMMARY_CHUNK_TOKENS = 2000
+SUMMARY_CHUNK_OVERLAP = 0
+INDEX_CHUNK_TOKENS = 200
+INDEX_CHUNK_OVERLAP = 30
+
+# Streamed pieces (e.g. PDF pages) are treated as separate paragraphs
+PIECE_SEPARATOR = "\n\n"
+
+# A segment ends after a paragraph break or after sentence punctuation (plus closing quotes/brackets)
+BOUNDARY_PATTERN = re.compile(r"\n[ \t]*\n\s*|[.!?][\"')\]]*\s+")
+WORD_PATTERN = re.compile(r"\S+\s*")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def get_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+    return _encoding
+
+def count_tokens(text):
+    return len(get_encoding().encode_ordinary(text))
+
+# Split text into sentence/paragraph segments: (start, end, ends_paragraph)
+def iter_segments(text):
+    start = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        yield start, match.end(), match.group().count("\n") >= 2
+        start = match.end()
+    if start < len(text):
+        yield start, len(text), True
+
+# Break a segment that is over budget at word boundaries, or by characters for a single huge "word"
+def _split_long_segment(text, start, end, tokens, max_tokens):
+    if tokens <= max_tokens:
+        yield start, end, tokens
+        return
+    words = [(m.start(), m.end()) for m in WORD_PATTERN.finditer(text, start, end)]
+    word_tokens = [len(t) for t in get_encoding().encode_ordinary_batch([text[s:e] for s, e in words])]
+    group_start, group_tokens = start, 0
+    for (word_start, word_end), n in zip(words, word_tokens):
+        if n > max_tokens:
+            if group_tokens:
+                yield group_start, word_start, group_tokens
+            step = max(1, (word_end - word_start) * max_tokens // n)
+            for piece_start in range(word_start, word_end, step):
+                piece_end = min(piece_start + step, word_end)
+                yield piece_start, piece_end, count_tokens(text[piece_start:piece_end])
+            group_start, group_tokens = word_end, 0
+        elif group_tokens + n > max_tokens:
+            yield group_start, word_start, group_tokens
+            group_start, group_tokens = word_start, n
+        else:
+            group_tokens += n
+    if group_tokens:
+        yield group_start, end, group_tokens
+
+# Lazily yield (start, end) character offsets of chunks of `text` that fit in `max_tokens`.
+# Chunks end on sentence boundaries, preferring a paragraph break once a chunk is at least half full,
+# and consecutive chunks share up to `overlap_tokens` of whole sentences.
+def iter_chunk_spans(text, max_tokens, overlap_tokens=0):
+    spans = list(iter_segments(text))
+    counts = get_encoding().encode_ordinary_batch([text[start:end] for start, end, _ in spans])
+    current = []  # [start, end, tokens, ends_paragraph, is_overlap]
+    total = 0
+    for (start, end, ends_paragraph), encoded in zip(spans, counts):
+        for piece_start, piece_end, tokens in _split_long_segment(text, start, end, len(encoded), max_tokens):
+            piece_ends_paragraph = ends_paragraph and piece_end == end
+            while current and total + tokens > max_tokens:
+                if all(segment[4] for segment in current):
+                    current, total = [], 0
+                    break
+                cut = len(current)
+                running = 0
+                for i, segment in enumerate(current, 1):
+                    running += segment[2]
+                    if segment[3] and not segment[4] and running * 2 >= max_tokens:
+                        cut = i
+                yield current[0][0], current[cut - 1][1]
+                keep = cut
+                kept_tokens = 0
+                while keep > 1 and kept_tokens + current[keep - 1][2] <= overlap_tokens:
+                    keep -= 1
+                    kept_tokens += current[keep][2]
+                carried = [segment[:4] + [True] for segment in current[keep:cut]]
+                current = carried + current[cut:]
+                total = sum(segment[2] for segment in current)
+            current.append([piece_start, piece_end, tokens, piece_ends_paragraph, False])
+            total += tokens
+    if current and not all(segment[4] for segment in current):
+        yield current[0][0], current[-1][1]
+
+def chunk_text(text, max_tokens=INDEX_CHUNK_TOKENS, overlap_tokens=INDEX_CHUNK_OVERLAP):
+    return [text[start:end] for start, end in iter_chunk_spans(text, max_tokens, overlap_tokens)]
+
+# Chunk a stream of text pieces as they arrive, holding back only the last, still-growing chunk
+def iter_text_chunks(pieces, max_tokens=SUMMARY_CHUNK_TOKENS, overlap_tokens=SUMMARY_CHUNK_OVERLAP):
+    buffer = ""
+    for piece in pieces:
+        buffer = f"{buffer}{PIECE_SEPARATOR}{piece}" if buffer else piece
+        spans = list(iter_chunk_spans(buffer, max_tokens, overlap_tokens))
+        for start, end in spans[:-1]:
+            yield buffer[start:end]
+        if len(spans) > 1:
+            buffer = buffer[spans[-1][0]:]
+    for start, end in iter_chunk_spans(buffer, max_tokens, overlap_tokens):
+        yield buffer[start:end]
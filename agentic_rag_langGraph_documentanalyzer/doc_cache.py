@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import Counter
+
+DOC_CACHE_DIR = os.getenv("DOC_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".doc_cache"))
+DOC_CACHE_MAX_BYTES = int(os.getenv("DOC_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# SHA-256 of an uploaded file or a path on disk, read without loading the whole file twice
+def file_digest(file):
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    file.seek(0)
+    digest = hashlib.file_digest(file, "sha256").hexdigest()
+    file.seek(0)
+    return digest
+
+# Cache keys are derived from the content hash plus the version of every stage that produced the value
+def cache_key(*parts):
+    return ":".join(str(part) for part in parts)
+
+# Rough size of a JSON value in characters, computed without serializing it
+def approximate_size(value):
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(approximate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + approximate_size(item) for key, item in value.items())
+    return 8
+
+# Keeps a copy of streamed text pieces for the "text" cache while passing them through.
+# Once they add up to more than the cache would store, the copy is dropped and `pieces` becomes None.
+class PieceRecorder:
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.size = 0
+        self.pieces = []
+
+    def record(self, pieces):
+        for piece in pieces:
+            if self.pieces is not None:
+                self.size += len(piece)
+                if self.size > self.max_chars:
+                    self.pieces = None
+                else:
+                    self.pieces.append(piece)
+            yield piece
+
+# Persistent, size-bounded LRU cache of JSON values, stored compressed in SQLite.
+# Values are grouped by namespace ("text", "chunks", "summary", ...) so hit/miss counts are reported per stage.
+class DocumentCache:
+    def __init__(self, cache_dir=DOC_CACHE_DIR, max_bytes=DOC_CACHE_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        # A value this large (e.g. the text of a multi-GB export) would just flush everything else
+        self.max_value_bytes = max_bytes // 4
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "cache.sqlite3"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self._db.commit()
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses[namespace] += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (time.time(), namespace, key),
+            )
+            self._db.commit()
+            self.hits[namespace] += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, namespace, key, value):
+        # Checked before serializing, so an oversized value is never copied into JSON
+        if approximate_size(value) > self.max_value_bytes:
+            return
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, blob, len(blob), time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    # Drop least recently used entries until the cache fits in max_bytes
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT namespace, key, size FROM entries ORDER BY last_access").fetchall()
+        for namespace, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            total -= size
+
+    def total_bytes(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self):
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {ns: {"hits": self.hits[ns], "misses": self.misses[ns]} for ns in namespaces}
+
+_document_cache = None
+_document_cache_lock = threading.Lock()
+
+# Opened lazily, once per process: the app, bulk ingestion and each of its workers get their own connection
+def get_document_cache():
+    global _document_cache
+    with _document_cache_lock:
+        if _document_cache is None:
+            _document_cache = DocumentCache()
+    return _document_cache
@@ -0,0 +1,132 @@
+import os
+import time
+import atexit
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+import http.client
+import xmlrpc.client
+from worker_pool import WorkerPool
+
+# Legacy .doc files are converted by long-lived LibreOffice instances driven through unoserver
+# (https://github.com/unoconv/unoserver). Each worker keeps one warm soffice process, and file
+# contents travel over its XML-RPC socket in memory, so a conversion costs neither a process
+# start nor temp-file I/O.
+
+DOC_CONVERTER_WORKERS = int(os.getenv("DOC_CONVERTER_WORKERS", 2))
+DOC_CONVERT_TIMEOUT_SECONDS = float(os.getenv("DOC_CONVERT_TIMEOUT_SECONDS", 60))
+DOC_CONVERTER_STARTUP_SECONDS = 60
+
+class DocConversionError(Exception):
+    pass
+
+def unoserver_available():
+    return shutil.which("unoserver") is not None
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# xmlrpc.client has no per-call timeout; set one on the underlying HTTP connection
+class _TimeoutTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+# One unoserver process (and the soffice it owns) with a private LibreOffice profile
+class ConverterWorker:
+    def __init__(self):
+        self.process = None
+        self.profile_dir = None
+        self.port = None
+
+    def start(self):
+        self.profile_dir = tempfile.mkdtemp(prefix="unoserver-profile-")
+        self.port = _free_port()
+        self.process = subprocess.Popen(
+            [
+                "unoserver",
+                "--interface", "127.0.0.1",
+                "--port", str(self.port),
+                "--uno-port", str(_free_port()),
+                "--user-installation", f"file://{self.profile_dir}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + DOC_CONVERTER_STARTUP_SECONDS
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise DocConversionError("unoserver did not start")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def convert(self, data, convert_to="txt", timeout=DOC_CONVERT_TIMEOUT_SECONDS):
+        proxy = xmlrpc.client.ServerProxy(
+            f"http://127.0.0.1:{self.port}", allow_none=True, transport=_TimeoutTransport(timeout)
+        )
+        # unoserver's convert(inpath, indata, outpath, convert_to, ...) returns the output bytes
+        # when no outpath is given
+        result = proxy.convert(None, xmlrpc.client.Binary(data), None, convert_to)
+        return result.data
+
+# Fixed-size pool of warm converters. A worker that times out or fails is restarted in the background,
+# so one bad file cannot wedge the pool or hold up the request that hit it.
+class DocConverterPool(WorkerPool):
+    def __init__(self, size=DOC_CONVERTER_WORKERS):
+        super().__init__(size)
+
+    def _create_worker(self):
+        worker = ConverterWorker()
+        worker.start()
+        return worker
+
+    def convert_to_text(self, data, timeout=DOC_CONVERT_TIMEOUT_SECONDS):
+        worker = self._acquire()
+        try:
+            output = worker.convert(data, "txt", timeout)
+        except xmlrpc.client.Fault as e:
+            # LibreOffice rejected the file; the worker itself is fine
+            self._release(worker)
+            raise DocConversionError(f"conversion failed: {e.faultString}") from e
+        except (OSError, http.client.HTTPException, xmlrpc.client.Error) as e:
+            self._replace(worker)
+            raise DocConversionError(f"conversion failed: {e}") from e
+        self._release(worker)
+        return output.decode("utf-8-sig", errors="replace")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_doc_converter():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DocConverterPool(DOC_CONVERTER_WORKERS)
+            atexit.register(_pool.close)
+    return _pool
@@ -0,0 +1,488 @@
+import os
+import re
+import atexit
+import json
+import codecs
+import shutil
+import zipfile
+import tempfile
+import itertools
+import posixpath
+import mimetypes
+import threading
+import xml.etree.ElementTree as ET
+from io import BytesIO
+from functools import partial
+from collections import deque
+from doc_converter import DocConversionError, get_doc_converter, unoserver_available
+from pdf_pool import PdfWorkerPool
+
+# Format backends (pdfplumber, python-docx, python-pptx, pandas, bs4, pypandoc) are imported
+# inside the extractors that use them, so a process only pays for the formats it actually sees.
+
+# Bump whenever extraction output changes so cached text is not reused
+EXTRACTOR_VERSION = "5"
+
+# Pages handed to one worker task, and how many tasks may be in flight at once.
+# Together they bound how many extracted pages are held in memory.
+PDF_PAGES_PER_TASK = 16
+PDF_MAX_WORKERS = os.cpu_count() or 1
+PDF_MAX_IN_FLIGHT = PDF_MAX_WORKERS * 2
+
+# Set to False in processes that already run one file per core (e.g. bulk ingestion workers)
+PDF_PARALLEL = True
+
+UNSUPPORTED_FILE_MESSAGE = "Unsupported file type. Please upload a document or readable file."
+
+# Bytes read from the start of a file to detect its format
+SNIFF_BYTES = 8192
+
+# CSV rows parsed per batch, and the approximate size of each emitted piece of JSON text.
+# Only one batch is held in memory at a time, whatever the size of the file.
+CSV_ROWS_PER_BATCH = 1000
+JSON_PIECE_CHARS = 32000
+JSON_READ_BYTES = 64 * 1024
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PPTX_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+class UnsupportedFileType(ValueError):
+    pass
+
+# mime type -> extractor(file) returning the whole text
+EXTRACTORS = {}
+# mime type -> extractor(file) yielding text pieces (pages, row batches, ...) as they are read
+STREAM_EXTRACTORS = {}
+# sniffer(head, file, name) -> mime type or None, tried in registration order
+SNIFFERS = []
+
+# Register an extractor for a mime type; usable as a decorator.
+# Streaming extractors are also usable wherever a whole-text extractor is expected.
+def register_extractor(mime_type, extractor=None, stream=False):
+    def decorator(func):
+        (STREAM_EXTRACTORS if stream else EXTRACTORS)[mime_type] = func
+        return func
+    return decorator(extractor) if extractor is not None else decorator
+
+def register_sniffer(sniffer):
+    SNIFFERS.append(sniffer)
+    return sniffer
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Workers are standalone interpreters (see pdf_pool.py): they inherit neither the Streamlit
+# server's threads nor its app script
+def get_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = PdfWorkerPool(PDF_MAX_WORKERS)
+            atexit.register(_pdf_pool.close)
+    return _pdf_pool
+
+def _iter_page_ranges(page_count, pages_per_task):
+    for start in range(0, page_count, pages_per_task):
+        yield start, min(start + pages_per_task, page_count)
+
+# Stream the text of a PDF page by page, in order.
+# Small documents are read inline; larger ones are split into page ranges that are
+# extracted in a process pool, with at most `max_in_flight` ranges outstanding.
+@register_extractor("application/pdf", stream=True)
+def iter_pdf_pages(file, pages_per_task=PDF_PAGES_PER_TASK, max_in_flight=PDF_MAX_IN_FLIGHT):
+    import pdfplumber
+    on_disk = isinstance(file, (str, os.PathLike))
+    if not on_disk:
+        file.seek(0)
+
+    with pdfplumber.open(file) as pdf:
+        page_count = len(pdf.pages)
+        if page_count <= pages_per_task or not PDF_PARALLEL:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+                page.close()
+            return
+
+    # Workers need a path to open; spool uploads to disk without an extra in-memory copy
+    if on_disk:
+        path = os.fspath(file)
+    else:
+        file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_pdf:
+            shutil.copyfileobj(file, temp_pdf)
+            path = temp_pdf.name
+
+    pool = get_pdf_pool()
+    ranges = _iter_page_ranges(page_count, pages_per_task)
+    pending = deque(
+        pool.submit(path, start, stop)
+        for start, stop in itertools.islice(ranges, max_in_flight)
+    )
+    try:
+        while pending:
+            texts = pending.popleft().result()
+            for start, stop in itertools.islice(ranges, 1):
+                pending.append(pool.submit(path, start, stop))
+            yield from texts
+    finally:
+        for future in pending:
+            future.cancel()
+        if not on_disk:
+            os.remove(path)
+
+def _docx_paragraphs(source):
+    from docx import Document
+    return "\n".join([para.text for para in Document(source).paragraphs])
+
+def _doc_text_with_pandoc(data):
+    import pypandoc
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".doc") as temp_doc:
+        temp_doc.write(data)
+        temp_doc_path = temp_doc.name
+    temp_docx_path = temp_doc_path + "x"
+    try:
+        pypandoc.convert_file(temp_doc_path, "docx", outputfile=temp_docx_path)
+        return _docx_paragraphs(temp_docx_path)
+    finally:
+        os.remove(temp_doc_path)
+        if os.path.exists(temp_docx_path):
+            os.remove(temp_docx_path)
+
+def extract_text_from_doc(file, file_type):
+    if file_type == "docx":
+        return _docx_paragraphs(BytesIO(file.read()))
+    elif file_type == "doc":
+        data = file.read()
+        if unoserver_available():
+            try:
+                return get_doc_converter().convert_to_text(data).strip()
+            except DocConversionError:
+                pass  # unoserver would not start or rejected the file; pandoc may still read it
+        return _doc_text_with_pandoc(data)
+    else:
+        return ""
+
+register_extractor("application/msword", partial(extract_text_from_doc, file_type="doc"))
+
+@register_extractor("application/vnd.ms-powerpoint")
+def extract_text_from_pptx(file):
+    from pptx import Presentation
+    prs = Presentation(BytesIO(file.read()))
+    return "\n".join([
+        shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")
+    ]).strip()
+
+# Fast path for DOCX/PPTX: stream-parse the XML parts straight out of the zip container
+# instead of building the python-docx / python-pptx object models
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+NOTES_SLIDE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide"
+
+# Lines of text parsed from one XML part: one per paragraph, and one per table row with cells
+# separated by " | ". Elements are cleared as soon as they are read.
+def _iter_ooxml_lines(stream, ns):
+    p, t, tab, br, tr, tc = (f"{{{ns}}}{tag}" for tag in ("p", "t", "tab", "br", "tr", "tc"))
+    rows = []   # open table rows (tables can nest), each a list of cell texts
+    cells = []  # open table cells, each a list of paragraph texts
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if elem.tag == tr:
+                rows.append([])
+            elif elem.tag == tc:
+                cells.append([])
+            continue
+        if elem.tag == p:
+            text = "".join(
+                node.text or "" if node.tag == t else "\t" if node.tag == tab else "\n"
+                for node in elem.iter() if node.tag in (t, tab, br)
+            )
+            if cells:
+                cells[-1].append(text)
+            elif text.strip():
+                yield text
+            elem.clear()
+        elif elem.tag == tc:
+            cell = " ".join(text.strip() for text in cells.pop() if text.strip())
+            if rows:
+                rows[-1].append(cell)
+            elem.clear()
+        elif elem.tag == tr:
+            row = " | ".join(rows.pop())
+            if cells:
+                cells[-1].append(row)
+            elif row.strip(" |"):
+                yield row
+            elem.clear()
+
+def _rels(container, part):
+    folder, name = posixpath.split(part)
+    rels_part = posixpath.join(folder, "_rels", f"{name}.rels")
+    if rels_part not in container.namelist():
+        return {}
+    with container.open(rels_part) as stream:
+        root = ET.parse(stream).getroot()
+    targets = {}
+    for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+        targets[rel.get("Id")] = (rel.get("Type"), target)
+    return targets
+
+# Slide parts in presentation order, each with its notes part (or None)
+def _pptx_slides(container):
+    presentation_rels = _rels(container, "ppt/presentation.xml")
+    with container.open("ppt/presentation.xml") as stream:
+        presentation = ET.parse(stream).getroot()
+    for slide_id in presentation.iter(f"{{{P_NS}}}sldId"):
+        _, slide = presentation_rels[slide_id.get(f"{{{R_NS}}}id")]
+        notes = next((target for rel_type, target in _rels(container, slide).values()
+                      if rel_type == NOTES_SLIDE_REL), None)
+        yield slide, notes
+
+# Speaker notes live in the notes slide's body placeholder (the others hold the slide image and number)
+def _pptx_notes(container, part):
+    with container.open(part) as stream:
+        root = ET.parse(stream).getroot()
+    lines = []
+    for shape in root.iter(f"{{{P_NS}}}sp"):
+        placeholder = shape.find(f".//{{{P_NS}}}ph")
+        if placeholder is not None and placeholder.get("type") == "body":
+            for paragraph in shape.iter(f"{{{A_NS}}}p"):
+                text = "".join(node.text or "" for node in paragraph.iter(f"{{{A_NS}}}t"))
+                if text.strip():
+                    lines.append(text)
+    return lines
+
+def _iter_docx_lines(file):
+    with zipfile.ZipFile(file) as container, container.open("word/document.xml") as stream:
+        yield from _iter_ooxml_lines(stream, W_NS)
+
+def _iter_pptx_slides(file):
+    with zipfile.ZipFile(file) as container:
+        for number, (slide, notes) in enumerate(_pptx_slides(container), 1):
+            with container.open(slide) as stream:
+                lines = [f"Slide {number}:", *_iter_ooxml_lines(stream, A_NS)]
+            if notes:
+                notes_lines = _pptx_notes(container, notes)
+                if notes_lines:
+                    lines.append("Notes: " + "\n".join(notes_lines))
+            yield "\n".join(lines)
+
+# Use the streaming fast path, falling back to the object model if the package is unusual.
+# The fallback only applies before anything was yielded, so no text is emitted twice.
+def _with_object_model_fallback(fast_path, fallback):
+    def extractor(file):
+        file.seek(0)
+        started = False
+        try:
+            for piece in fast_path(file):
+                started = True
+                yield piece
+        except (zipfile.BadZipFile, KeyError, ET.ParseError):
+            if started:
+                raise
+            file.seek(0)
+            yield fallback(file)
+    return extractor
+
+OOXML_PARAGRAPHS_PER_PIECE = 200
+
+def _batched_lines(lines, size=OOXML_PARAGRAPHS_PER_PIECE):
+    iterator = iter(lines)
+    while batch := list(itertools.islice(iterator, size)):
+        yield "\n".join(batch)
+
+register_extractor(DOCX_TYPE, _with_object_model_fallback(
+    lambda file: _batched_lines(_iter_docx_lines(file)), partial(extract_text_from_doc, file_type="docx")
+), stream=True)
+register_extractor(PPTX_TYPE, _with_object_model_fallback(_iter_pptx_slides, extract_text_from_pptx), stream=True)
+
+@register_extractor("text/plain")
+def extract_text_from_txt(file):
+    return file.read().decode("utf-8").strip()
+
+@register_extractor("text/html")
+def extract_text_from_html(file):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(file, "html.parser")
+    return soup.get_text().strip()
+
+# Incremental JSON reader over a binary stream: decodes one value at a time from a sliding buffer
+class _JsonReader:
+    WHITESPACE = re.compile(r"\s*")
+    DECODER = json.JSONDecoder()
+
+    def __init__(self, file, read_bytes=JSON_READ_BYTES):
+        self.file = file
+        self.read_bytes = read_bytes
+        self.text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        if self.eof:
+            return False
+        data = self.file.read(size)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(data, final=self.eof)
+        self.pos = 0
+        return not self.eof
+
+    # Next non-whitespace character without consuming it ("" at end of input)
+    def peek(self):
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.read_bytes):
+                return ""
+
+    def take(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Malformed JSON: expected one of {expected!r}, found {char!r}")
+        self.pos += 1
+        return char
+
+    # Decode one complete value. A value ending exactly at the end of the buffer may be a
+    # truncated number, so it only counts once more input (or the end of the file) is seen.
+    def value(self):
+        self.peek()
+        size = self.read_bytes
+        while True:
+            try:
+                value, end = self.DECODER.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+# Walk a JSON document yielding (path, value) pairs. Objects are descended into, so a large
+# array nested under any key is streamed too; array elements are decoded one at a time.
+def _walk_json(reader, path=""):
+    char = reader.peek()
+    if char == "{":
+        reader.take("{")
+        if reader.peek() == "}":
+            reader.take("}")
+            return
+        while True:
+            key = reader.value()
+            reader.take(":")
+            yield from _walk_json(reader, f"{path}.{key}" if path else str(key))
+            if reader.take(",}") == "}":
+                return
+    elif char == "[":
+        reader.take("[")
+        if reader.peek() == "]":
+            reader.take("]")
+            return
+        index = 0
+        while True:
+            yield f"{path}[{index}]", reader.value()
+            index += 1
+            if reader.take(",]") == "]":
+                return
+    else:
+        yield path, reader.value()
+
+@register_extractor("application/json", stream=True)
+def iter_json_pieces(file):
+    file.seek(0)
+    lines, size = [], 0
+    for path, value in _walk_json(_JsonReader(file)):
+        rendered = json.dumps(value, ensure_ascii=False)
+        line = f"{path}: {rendered}" if path else rendered
+        lines.append(line)
+        size += len(line)
+        if size >= JSON_PIECE_CHARS:
+            yield "\n".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "\n".join(lines)
+
+@register_extractor("text/csv", stream=True)
+def iter_csv_pieces(file):
+    import pandas as pd
+    file.seek(0)
+    with pd.read_csv(file, chunksize=CSV_ROWS_PER_BATCH) as batches:
+        for batch in batches:
+            yield batch.to_string()
+
+# Binary signatures win over the file name, so a mislabelled upload still reaches the right backend
+
+@register_sniffer
+def sniff_pdf(head, file, name):
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+
+# DOCX and PPTX are zip containers; tell them apart by their main part
+@register_sniffer
+def sniff_office_zip(head, file, name):
+    if not head.startswith(b"PK\x03\x04"):
+        return None
+    try:
+        with zipfile.ZipFile(file) as container:
+            names = set(container.namelist())
+    except zipfile.BadZipFile:
+        return None
+    finally:
+        file.seek(0)
+    if "word/document.xml" in names:
+        return DOCX_TYPE
+    if "ppt/presentation.xml" in names:
+        return PPTX_TYPE
+
+# Legacy Office files share the OLE2 compound-file signature; the extension picks the application
+@register_sniffer
+def sniff_ole2(head, file, name):
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        guessed, _ = mimetypes.guess_type(name)
+        return "application/vnd.ms-powerpoint" if guessed == "application/vnd.ms-powerpoint" else "application/msword"
+
+@register_sniffer
+def sniff_html(head, file, name):
+    start = head.lstrip(b"\xef\xbb\xbf \t\r\n")[:14].lower()
+    if start.startswith((b"<!doctype html", b"<html")):
+        return "text/html"
+
+# Detect a file's mime type from its leading bytes, falling back to its name
+def detect_file_type(file):
+    name = getattr(file, "name", "") or ""
+    file.seek(0)
+    head = file.read(SNIFF_BYTES)
+    file.seek(0)
+    for sniffer in SNIFFERS:
+        file_type = sniffer(head, file, name)
+        if file_type:
+            return file_type
+    file_type, _ = mimetypes.guess_type(name)
+    return file_type
+
+def is_supported_file(name):
+    file_type, _ = mimetypes.guess_type(name)
+    return file_type in EXTRACTORS or file_type in STREAM_EXTRACTORS
+
+# Yield the text of a file in pieces: page by page (or batch by batch) for streaming formats,
+# otherwise as one piece. Raises UnsupportedFileType for formats with no extractor.
+def iter_text_pieces(file):
+    file_type = detect_file_type(file)
+    if file_type in STREAM_EXTRACTORS:
+        for piece in STREAM_EXTRACTORS[file_type](file):
+            if piece.strip():
+                yield piece
+    elif file_type in EXTRACTORS:
+        text = EXTRACTORS[file_type](file)
+        if text:
+            yield text
+    else:
+        raise UnsupportedFileType(file_type or getattr(file, "name", "unknown"))
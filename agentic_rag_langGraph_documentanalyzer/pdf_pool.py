@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from worker_pool import WorkerPool
+
+# PDF page ranges are extracted by long-lived worker interpreters running this file, exchanging one
+# JSON message per line over stdin/stdout. They are not multiprocessing children: under Streamlit the
+# app script is installed as __main__, and spawned children would re-run it (importing streamlit,
+# langgraph, openai, ... and compiling the graphs) before extracting a single page. A worker here
+# imports only pdfplumber.
+
+class PdfWorkerError(RuntimeError):
+    pass
+
+# Runs in a worker process: extract a contiguous range of pages from a PDF on disk
+def extract_pdf_page_range(path, start, stop):
+    import pdfplumber
+    texts = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text() or "")
+            page.close()  # Drop the page's cached layout objects
+    return texts
+
+def _worker_main():
+    # Keep the protocol on private descriptors, so anything a library prints goes to stderr instead
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+    os.dup2(2, 1)
+    import pdfplumber  # Warm the worker before its first request
+    for line in requests:
+        request = json.loads(line)
+        try:
+            response = {"texts": extract_pdf_page_range(request["path"], request["start"], request["stop"])}
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+# One worker interpreter
+class PdfWorker:
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8",
+        )
+
+    def extract(self, path, start, stop):
+        self.process.stdin.write(json.dumps({"path": path, "start": start, "stop": stop}) + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise OSError(f"PDF worker exited with code {self.process.wait()}")
+        return json.loads(line)
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass  # Unflushed input to a dead worker
+
+# Fixed-size pool of warm workers, started on first use. submit() returns a Future like
+# ProcessPoolExecutor.submit; a worker that dies is replaced by the next caller.
+class PdfWorkerPool(WorkerPool):
+    def __init__(self, size):
+        super().__init__(size)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="pdf-worker")
+
+    def _create_worker(self):
+        return PdfWorker()
+
+    def _extract(self, path, start, stop):
+        worker = self._acquire()
+        try:
+            response = worker.extract(path, start, stop)
+        except (OSError, ValueError) as e:
+            self._discard(worker)
+            raise PdfWorkerError(f"extracting pages {start}-{stop} failed: {e}") from e
+        self._release(worker)
+        if "error" in response:
+            raise PdfWorkerError(f"extracting pages {start}-{stop} failed: {response['error']}")
+        return response["texts"]
+
+    def submit(self, path, start, stop):
+        return self._executor.submit(self._extract, path, start, stop)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().close()
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,152 @@
+import re
+import zlib
+import base64
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from doc_cache import get_document_cache
+
+EMBEDDING_DIM = 1024
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Weight of the BM25 score against the hashed-embedding cosine score when ranking
+BM25_WEIGHT = 0.6
+
+# Number of loaded indexes kept in memory
+LOADED_INDEX_LIMIT = 8
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+# Stable hash (Python's hash() is salted per process, so it cannot be persisted)
+def _bucket(feature):
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % EMBEDDING_DIM, 1.0 if h & 0x80000000 else -1.0
+
+# Feature-hashed bag of unigrams and bigrams with sublinear term frequency, L2-normalised
+def hashed_embedding(tokens):
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature, count in features.items():
+        bucket, sign = _bucket(feature)
+        vector[bucket] += sign * (1.0 + np.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# In-process hybrid index over one document's chunks: a BM25 inverted index plus
+# a matrix of hashed embeddings. Chunks can be added while the document is still streaming in.
+class ChunkIndex:
+    def __init__(self):
+        self.chunks = []
+        self.doc_lengths = []
+        self.postings = {}  # term -> [[chunk_id, term_frequency], ...]
+        self._vectors = []
+        self._matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def add(self, chunks):
+        for chunk in chunks:
+            chunk_id = len(self.chunks)
+            tokens = tokenize(chunk)
+            self.chunks.append(chunk)
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, []).append([chunk_id, tf])
+            self._vectors.append(hashed_embedding(tokens))
+
+    @property
+    def matrix(self):
+        if self._vectors:
+            self._matrix = np.vstack([self._matrix, *self._vectors])
+            self._vectors = []
+        return self._matrix
+
+    def bm25_scores(self, query_tokens):
+        n = len(self.chunks)
+        scores = np.zeros(n, dtype=np.float32)
+        doc_lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        avg_length = doc_lengths.mean() if n else 0.0
+        for term in set(query_tokens):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            ids, tfs = np.asarray(postings, dtype=np.int64).T
+            tfs = tfs.astype(np.float32)
+            idf = np.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lengths[ids] / max(avg_length, 1.0))
+            scores[ids] += idf * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+        return scores
+
+    # Return the top-k (chunk_id, score) pairs for a query, best first
+    def search(self, query, k=5):
+        if not self.chunks:
+            return []
+        tokens = tokenize(query)
+        bm25 = self.bm25_scores(tokens)
+        cosine = np.clip(self.matrix @ hashed_embedding(tokens), 0.0, None)
+        if bm25.max() > 0:
+            bm25 /= bm25.max()
+        scores = BM25_WEIGHT * bm25 + (1.0 - BM25_WEIGHT) * cosine
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    # Everything but the chunk text, which the document cache already holds under "chunks".
+    # Embeddings are stored as float16, which is plenty for cosine ranking.
+    def to_dict(self):
+        matrix = self.matrix.astype(np.float16).tobytes()
+        return {"doc_lengths": self.doc_lengths, "postings": self.postings, "matrix": base64.b64encode(matrix).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, chunks, data):
+        index = cls()
+        index.chunks = chunks
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = data["postings"]
+        matrix = np.frombuffer(base64.b64decode(data["matrix"]), dtype=np.float16)
+        index._matrix = matrix.reshape(-1, EMBEDDING_DIM).astype(np.float32)
+        return index
+
+_loaded_indexes = OrderedDict()
+_loaded_indexes_lock = threading.Lock()
+
+def _remember(document_key, index):
+    with _loaded_indexes_lock:
+        _loaded_indexes[document_key] = index
+        _loaded_indexes.move_to_end(document_key)
+        while len(_loaded_indexes) > LOADED_INDEX_LIMIT:
+            _loaded_indexes.popitem(last=False)
+
+# Indexes live in the document cache next to the document's "chunks" entry (same key), so they count
+# towards its size limit and are evicted with everything else. Pass keep_loaded=False to only store it.
+def save_index(document_key, index, keep_loaded=True):
+    get_document_cache().put("index", document_key, index.to_dict())
+    if keep_loaded:
+        _remember(document_key, index)
+
+# Fetch a document's index from memory or the document cache; None once its chunks are gone.
+# If only the index entry was evicted, it is rebuilt from the chunks.
+def load_index(document_key):
+    with _loaded_indexes_lock:
+        index = _loaded_indexes.get(document_key)
+    if index is None:
+        cache = get_document_cache()
+        chunks = cache.get("chunks", document_key)
+        if chunks is None:
+            return None
+        data = cache.get("index", document_key)
+        if data is None:
+            index = ChunkIndex()
+            index.add(chunks)
+            save_index(document_key, index)
+            return index
+        index = ChunkIndex.from_dict(chunks, data)
+    _remember(document_key, index)
+    return index
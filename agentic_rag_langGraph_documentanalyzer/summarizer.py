@@ -0,0 +1,104 @@
+import asyncio
+import random
+import openai
+from chunker import count_tokens
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 500
+
+# Bump whenever prompts or the reduce strategy change so cached summaries are not reused
+SUMMARY_VERSION = f"{SUMMARY_MODEL}:2"
+
+# How many chat completions may be in flight at once
+SUMMARY_MAX_CONCURRENCY = 8
+
+# Partial summaries are combined in groups that fit into one prompt of this many tokens
+REDUCE_CONTEXT_TOKENS = 6000
+
+# Retry policy for rate limits and transient API failures
+MAX_RETRIES = 6
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+    openai.error.Timeout,
+    openai.error.TryAgain,
+)
+
+MAP_PROMPT = "Summarize the following document:\n\n{text}"
+REDUCE_PROMPT = (
+    "The following are summaries of consecutive parts of one document. "
+    "Combine them into a single coherent summary:\n\n{text}"
+)
+
+# One chat completion, retried with exponential backoff and jitter
+async def complete_with_retry(prompt, semaphore):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                response = await openai.ChatCompletion.acreate(
+                    model=SUMMARY_MODEL,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=SUMMARY_MAX_TOKENS
+                )
+            return response['choices'][0]['message']['content'].strip()
+        except RETRYABLE_ERRORS:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+# Iterate a blocking iterator (e.g. streamed PDF pages) without blocking the event loop
+async def iterate_in_thread(iterable):
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+# Split summaries into consecutive groups that fit one reduce prompt (at least two per group)
+def group_for_reduce(summaries, context_tokens=REDUCE_CONTEXT_TOKENS):
+    groups, group, size = [], [], 0
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if len(group) >= 2 and size + tokens > context_tokens:
+            groups.append(group)
+            group, size = [], 0
+        group.append(summary)
+        size += tokens
+    if group:
+        groups.append(group)
+    return groups
+
+# Map: summarize every chunk concurrently as chunks arrive.
+# Reduce: combine partial summaries level by level until a single summary remains.
+# Pass a shared `semaphore` to bound LLM calls across several documents summarized at once.
+async def map_reduce_summarize(chunks, max_concurrency=SUMMARY_MAX_CONCURRENCY,
+                               context_tokens=REDUCE_CONTEXT_TOKENS, semaphore=None):
+    semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+    tasks = []
+    async for chunk in iterate_in_thread(chunks):
+        tasks.append(asyncio.create_task(
+            complete_with_retry(MAP_PROMPT.format(text=chunk), semaphore)
+        ))
+    summaries = list(await asyncio.gather(*tasks))
+
+    while len(summaries) > 1:
+        summaries = list(await asyncio.gather(*[
+            complete_with_retry(REDUCE_PROMPT.format(text="\n\n".join(group)), semaphore)
+            if len(group) > 1 else asyncio.sleep(0, result=group[0])
+            for group in group_for_reduce(summaries, context_tokens)
+        ]))
+    return summaries[0] if summaries else ""
+
+def summarize_chunks(chunks, max_concurrency=SUMMARY_MAX_CONCURRENCY):
+    return asyncio.run(map_reduce_summarize(chunks, max_concurrency))
@@ -0,0 +1,75 @@
+import queue
+import threading
+
+# Fixed-size pool of long-lived worker processes, shared by the PDF extractors and the .doc converters.
+# Workers are started on first use, up to `size`; callers wait for an idle one beyond that.
+# Subclasses implement _create_worker(), returning an object with a stop() method.
+class WorkerPool:
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.Queue()
+        self._started = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _create_worker(self):
+        raise NotImplementedError
+
+    def _start_worker(self):
+        try:
+            worker = self._create_worker()
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                start_new = self._idle.empty() and self._started < self.size
+                if start_new:
+                    self._started += 1
+            if start_new:
+                return self._start_worker()
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue  # A broken worker may have freed a slot
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    # Stop a broken worker and free its slot; the next caller that finds no idle worker starts one
+    def _discard(self, worker):
+        worker.stop()
+        with self._lock:
+            self._workers.remove(worker)
+            self._started -= 1
+
+    # Stop a broken worker and start its replacement in the background, so the caller is not held up
+    def _replace(self, worker):
+        worker.stop()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if self._closed:
+                self._started -= 1
+                return
+
+        def start():
+            try:
+                self._release(self._start_worker())
+            except Exception:
+                pass  # The slot was released; the next caller starts a fresh worker
+        threading.Thread(target=start, daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
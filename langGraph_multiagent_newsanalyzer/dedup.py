@@ -0,0 +1,63 @@
+import re
+import zlib
+import itertools
+import numpy as np
+
+# Near-duplicate detection for syndicated stories: MinHash signatures over word shingles,
+# bucketed with LSH banding so only candidate pairs are compared.
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32  # 4 rows per band: pairs above ~0.4 Jaccard become candidates
+SIMILARITY_THRESHOLD = 0.6  # estimated Jaccard similarity needed to count as a duplicate
+
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_rng = np.random.default_rng(20240607)
+_coefficients = _rng.integers(1, int(MERSENNE_PRIME), size=(2, NUM_PERMUTATIONS), dtype=np.uint64)
+
+def shingles(text):
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+# MinHash signature: for each of the hash functions (a * x + b) mod p, the minimum over the shingle hashes
+def minhash_signature(text):
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles(text)], dtype=np.uint64)
+    if not len(hashes):
+        return np.full(NUM_PERMUTATIONS, MERSENNE_PRIME, dtype=np.uint64)
+    a, b = _coefficients
+    return ((np.outer(hashes, a) + b) % MERSENNE_PRIME).min(axis=0)
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+# Group texts that are near-duplicates of each other. Returns lists of indices in input order;
+# the first index of each group is its representative.
+def group_near_duplicates(texts, threshold=SIMILARITY_THRESHOLD, bands=LSH_BANDS):
+    if not texts:
+        return []
+    signatures = np.vstack([minhash_signature(text) for text in texts])
+    rows = NUM_PERMUTATIONS // bands
+    parents = list(range(len(texts)))
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(i)
+        # Buckets hold a handful of articles, so every pair in them is a candidate
+        for members in buckets.values():
+            for first, other in itertools.combinations(members, 2):
+                first_root, other_root = _find(parents, first), _find(parents, other)
+                if first_root == other_root:
+                    continue
+                if np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parents[max(first_root, other_root)] = min(first_root, other_root)
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(_find(parents, i), []).append(i)
+    return list(groups.values())
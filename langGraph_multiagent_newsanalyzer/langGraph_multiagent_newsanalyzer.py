@@ -1,83 +1,59 @@
 import os
+import asyncio
 import requests
 import streamlit as st
 from dotenv import load_dotenv
-from langchain.chat_models import ChatOpenAI
-from langgraph.graph import StateGraph
-from typing import TypedDict
+from news_client import DEFAULT_PAGE_SIZE, NewsAPIError, fetch_news
+from news_agents import analyze_articles, article_text, configure_llm
+from dedup import group_near_duplicates
 
 # Load API keys
 load_dotenv()
 OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
 NEWS_API_KEY = st.secrets["NEWS_API_KEY"]
 
-# Initialize OpenAI model with GPT-4o-mini
-llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=OPENAI_API_KEY)
-
-# Define News API Fetcher
-def fetch_news(topic):
-    url = f"https://newsapi.org/v2/everything?q={topic}&apiKey={NEWS_API_KEY}&pageSize=4&sortBy=publishedAt&language=en"
-    response = requests.get(url)
-    articles = response.json().get("articles", [])
-
-    news_data = []
-    for article in articles:
-        title = article.get("title")
-        description = article.get("description")
-        link = article.get("url")
-        published_at = article.get("publishedAt")
-
-        # Skip articles that don't have a title or description
-        if title and description:
-            news_data.append({"title": title, "description": description, "link": link, "published_at": published_at})
-    
-    return news_data
- 
-
-# Define State for Multi-Agent Workflow
-class AgentState(TypedDict):
-    news: str
-    summary: str
-    fake_news: str
-    sentiment: str
-
-# Summarization Agent
-def summarizer(state):
-    return {"summary": llm.predict(f"Summarize this article: {state['news']}")}
-
-# Fake News Detection Agent
-def fake_news_detector(state):
-    return {"fake_news": llm.predict(f"Detect if this news contains fake or misleading information: {state['news']}")}
-
-# Sentiment Analysis Agent
-def sentiment_analyzer(state):
-    return {"sentiment": llm.predict(f"Analyze sentiment: {state['summary']}")}
-
-# Build LangGraph Multi-Agent Workflow
-workflow = StateGraph(AgentState)
-workflow.add_node("summarizer", summarizer)
-workflow.add_node("fake_news_detector", fake_news_detector)
-workflow.add_node("sentiment_analyzer", sentiment_analyzer)
-
-workflow.set_entry_point("summarizer")
-workflow.add_edge("summarizer", "fake_news_detector")
-workflow.add_edge("summarizer", "sentiment_analyzer")
-
-runnable = workflow.compile()
+configure_llm(OPENAI_API_KEY)
+
+# Fill each article's placeholder as soon as its analysis finishes
+async def render_analyses(news_list, placeholders):
+    async for i, result in analyze_articles(news_list):
+        with placeholders[i].container():
+            if isinstance(result, Exception):
+                st.error(f"Analysis failed: {result}")
+                continue
+            st.write(f"**Summary:** {result.get('summary', 'No Summary Available')}")
+            st.write(f"**Fake News Check:** {result.get('fake_news', 'No Fake News Check Available')}")
+            st.write(f"**Sentiment Analysis:** {result.get('sentiment', 'No Sentiment Analysis Available')}")
+            timings = result.get("timings", {})
+            if timings:
+                st.caption(" · ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items()))
 
 # Streamlit UI
 st.title("📰 AI News Analyzer (Multi-Agent)")
 
 topic = st.text_input("Enter a topic (e.g., AI, Sports, Economy)")
+page_size = st.slider("Articles to analyze", min_value=1, max_value=100, value=DEFAULT_PAGE_SIZE)
 if st.button("Analyze News"):
-    news_list = fetch_news(topic)
+    try:
+        news_list = fetch_news(NEWS_API_KEY, topic, page_size)
+    except (NewsAPIError, requests.RequestException) as e:
+        st.error(f"Could not fetch news: {e}")
+        st.stop()
 
     if not news_list:
         st.error("No articles found.")
-    elif len(news_list) < 4:
+    elif len(news_list) < page_size:
         st.warning(f"Only {len(news_list)} articles found for '{topic}'. Some might be missing required fields.")
 
-    for i, news in enumerate(news_list):
+    # Syndicated copies of a story are analyzed once, through their first (most recent) article
+    groups = group_near_duplicates([article_text(news) for news in news_list])
+    if len(groups) < len(news_list):
+        st.info(f"{len(news_list)} articles, {len(groups)} distinct stories: near-duplicates are grouped and analyzed once.")
+
+    # Show every article right away; the analyses fill in as they complete
+    placeholders = []
+    for i, group in enumerate(groups):
+        news = news_list[group[0]]
         title = news.get("title", "No Title Available")
         description = news.get("description", "No Description Available")
 
@@ -85,13 +61,16 @@ if st.button("Analyze News"):
         st.write(f"📅 Published On: {news.get('published_at', 'Unknown')[:10]}")
         st.write(f"**Description:** {description}")
         st.write(f"🔗 [Read Full Article]({news.get('link', '#')})")  
+        if len(group) > 1:
+            st.write("**Also reported as:** " + " · ".join(
+                f"[{news_list[j]['title']}]({news_list[j].get('link', '#')})" for j in group[1:]
+            ))
 
-        # Process AI Analysis
-        news_text = f"{title} - {description}"
-        result = runnable.invoke({"news": news_text})
+        placeholder = st.empty()
+        placeholder.info("Analyzing...")
+        placeholders.append(placeholder)
 
-        st.write(f"**Summary:** {result.get('summary', 'No Summary Available')}")
-        st.write(f"**Fake News Check:** {result.get('fake_news', 'No Fake News Check Available')}")
-        st.write(f"**Sentiment Analysis:** {result.get('sentiment', 'No Sentiment Analysis Available')}")
+    # Process AI Analysis
+    asyncio.run(render_analyses([news_list[group[0]] for group in groups], placeholders))
 
 
@@ -0,0 +1,98 @@
+import time
+import operator
+from langchain.chat_models import ChatOpenAI
+from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableConfig
+from typing import Annotated, TypedDict
+from sentiment import LOCAL_SENTIMENT_CONFIDENCE, SentimentBatcher, score_sentiments
+
+# The summarizer / fake-news / sentiment graph, shared by the Streamlit app and the headless watcher
+
+LLM_MODEL = "gpt-4o-mini"
+
+llm = None
+
+# Initialize OpenAI model with GPT-4o-mini; call once before running the graph
+def configure_llm(openai_api_key):
+    global llm
+    llm = ChatOpenAI(model=LLM_MODEL, openai_api_key=openai_api_key)
+
+# Define State for Multi-Agent Workflow
+class AgentState(TypedDict):
+    news: str
+    summary: str
+    fake_news: str
+    sentiment: str
+    sentiment_source: str  # "local" or "llm"
+    # Seconds spent in each node; parallel branches write to it in the same step, so updates are merged
+    timings: Annotated[dict, operator.or_]
+
+# Record how long an agent node takes alongside its output
+def timed(name, agent):
+    async def node(state, config: RunnableConfig):
+        start = time.perf_counter()
+        update = await agent(state, config)
+        return {**update, "timings": {name: time.perf_counter() - start}}
+    return node
+
+# Summarization Agent
+async def summarizer(state, config):
+    return {"summary": await llm.apredict(f"Summarize this article: {state['news']}")}
+
+# Fake News Detection Agent
+async def fake_news_detector(state, config):
+    return {"fake_news": await llm.apredict(f"Detect if this news contains fake or misleading information: {state['news']}")}
+
+# Sentiment Analysis Agent: clear-cut summaries are labelled by the local lexicon scorer,
+# only low-confidence ones cost an LLM call. Within a run, summaries are scored in batches by the
+# run's SentimentBatcher (config["configurable"]["sentiment_batcher"]).
+async def sentiment_analyzer(state, config):
+    batcher = config.get("configurable", {}).get("sentiment_batcher")
+    if batcher is None:
+        [(label, confidence)] = score_sentiments([state["summary"]])
+    else:
+        label, confidence = await batcher.score(state["summary"])
+    if confidence >= LOCAL_SENTIMENT_CONFIDENCE:
+        return {
+            "sentiment": f"{label.capitalize()} (local lexicon score, confidence {confidence:.2f})",
+            "sentiment_source": "local",
+        }
+    return {"sentiment": await llm.apredict(f"Analyze sentiment: {state['summary']}"), "sentiment_source": "llm"}
+
+# Join: runs once both branches are done and records the latency of the slowest one
+def join_results(state):
+    timings = state["timings"]
+    critical_path = max(
+        timings["summarizer"] + timings["sentiment_analyzer"], timings["fake_news_detector"]
+    )
+    return {"timings": {"critical_path": critical_path}}
+
+# Build LangGraph Multi-Agent Workflow.
+# The fake news check only needs the article, so it runs alongside summarizer -> sentiment_analyzer.
+workflow = StateGraph(AgentState)
+workflow.add_node("summarizer", timed("summarizer", summarizer))
+workflow.add_node("fake_news_detector", timed("fake_news_detector", fake_news_detector))
+workflow.add_node("sentiment_analyzer", timed("sentiment_analyzer", sentiment_analyzer))
+workflow.add_node("join_results", join_results)
+
+workflow.add_edge(START, "summarizer")
+workflow.add_edge(START, "fake_news_detector")
+workflow.add_edge("summarizer", "sentiment_analyzer")
+workflow.add_edge(["fake_news_detector", "sentiment_analyzer"], "join_results")
+workflow.add_edge("join_results", END)
+
+runnable = workflow.compile()
+
+# Articles run through the graph at once; each one is up to three LLM calls
+MAX_CONCURRENT_ARTICLES = 4
+
+def article_text(news):
+    return f"{news.get('title', 'No Title Available')} - {news.get('description', 'No Description Available')}"
+
+# Analyze all articles concurrently, yielding (index, result) in completion order.
+# A failed article yields its exception instead of cancelling the rest of the batch.
+async def analyze_articles(news_list, max_concurrency=MAX_CONCURRENT_ARTICLES):
+    inputs = [{"news": article_text(news)} for news in news_list]
+    config = {"max_concurrency": max_concurrency, "configurable": {"sentiment_batcher": SentimentBatcher()}}
+    async for i, result in runnable.abatch_as_completed(inputs, config=config, return_exceptions=True):
+        yield i, result
@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Point NEWS_API_BASE_URL at a local stub server (anything serving /everything in NewsAPI's
+# JSON format) to run the app without a key or rate limits.
+NEWS_API_BASE_URL = os.getenv("NEWS_API_BASE_URL", "https://newsapi.org/v2")
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", 600))
+NEWS_CACHE_MAX_ENTRIES = 256
+
+# (connect, read) timeouts in seconds
+NEWS_API_TIMEOUT = (3.05, 15)
+
+# Connections kept open to the API, shared by every Streamlit session
+NEWS_API_POOL_SIZE = 16
+
+# NewsAPI returns at most 100 articles per request; larger requests are paged
+NEWS_API_MAX_PAGE_SIZE = 100
+
+# Articles fetched per topic by default
+DEFAULT_PAGE_SIZE = 4
+
+class NewsAPIError(Exception):
+    pass
+
+# Topics that differ only in case or spacing share a cache entry
+def normalize_topic(topic):
+    return " ".join(topic.lower().split())
+
+class CachedResult:
+    def __init__(self, articles, validators, ttl):
+        self.articles = articles
+        self.validators = validators  # ETag / Last-Modified of the first page
+        self.expires_at = time.monotonic() + ttl
+
+# Thread-safe NewsAPI client: pooled keep-alive connections, a TTL cache of results per
+# (topic, page size), and a single upstream request for concurrent identical fetches.
+# Expired entries are revalidated with If-None-Match / If-Modified-Since when the API sent validators.
+class NewsClient:
+    def __init__(self, api_key, base_url=NEWS_API_BASE_URL, ttl=NEWS_CACHE_TTL_SECONDS,
+                 timeout=NEWS_API_TIMEOUT, max_entries=NEWS_CACHE_MAX_ENTRIES):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        # The key travels in a header so it stays out of URLs and logs
+        self.session.headers["X-Api-Key"] = api_key
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=NEWS_API_POOL_SIZE, pool_maxsize=NEWS_API_POOL_SIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _get(self, params, validators=None):
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        response = self.session.get(f"{self.base_url}/everything", params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None, validators
+        data = response.json()
+        if response.status_code != 200 or data.get("status") == "error":
+            raise NewsAPIError(data.get("message") or f"NewsAPI returned HTTP {response.status_code}")
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        return data, validators
+
+    # Fetch up to page_size articles, paging when more than one request's worth is wanted.
+    # Returns None if the first page was not modified since `cached`.
+    def _fetch(self, topic, page_size, cached):
+        per_request = min(page_size, NEWS_API_MAX_PAGE_SIZE)
+        params = {"q": topic, "pageSize": per_request, "sortBy": "publishedAt", "language": "en"}
+        articles = []
+        page = 1
+        validators = None
+        while len(articles) < page_size:
+            try:
+                data, page_validators = self._get(
+                    {**params, "page": page}, cached.validators if cached and page == 1 else None
+                )
+            except NewsAPIError:
+                # Plans cap how deep results can be paged; keep what was already fetched
+                if page > 1:
+                    break
+                raise
+            if data is None:
+                return None, page_validators
+            if page == 1:
+                validators = page_validators
+            batch = data.get("articles", [])
+            articles.extend(batch)
+            if len(batch) < per_request or len(articles) >= data.get("totalResults", 0):
+                break
+            page += 1
+        return articles[:page_size], validators
+
+    def _store(self, key, result):
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def everything(self, topic, page_size=DEFAULT_PAGE_SIZE):
+        key = (normalize_topic(topic), page_size)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached.expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                return cached.articles
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            articles, validators = self._fetch(key[0], page_size, cached)
+            if articles is None:
+                articles = cached.articles
+            self._store(key, CachedResult(articles, validators, self.ttl))
+            future.set_result(articles)
+            return articles
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Clients are kept per API key, so their connection pool and response cache outlive a single query
+def get_news_client(api_key):
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = NewsClient(api_key)
+    return client
+
+# Articles that have a title and description, reduced to the fields the analyzers use
+def fetch_news(api_key, topic, page_size=DEFAULT_PAGE_SIZE):
+    articles = get_news_client(api_key).everything(topic, page_size)
+
+    news_data = []
+    for article in articles:
+        title = article.get("title")
+        description = article.get("description")
+        link = article.get("url")
+        published_at = article.get("publishedAt")
+
+        # Skip articles that don't have a title or description
+        if title and description:
+            news_data.append({"title": title, "description": description, "link": link, "published_at": published_at})
+    
+    return news_data
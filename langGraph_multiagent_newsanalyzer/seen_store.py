@@ -0,0 +1,97 @@
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+
+SEEN_STORE_PATH = os.getenv(
+    "SEEN_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "seen_articles.sqlite3")
+)
+BLOOM_INITIAL_CAPACITY = 100_000
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+# Same story, same hash: case and whitespace differences are ignored
+def content_hash(news):
+    text = " ".join(f"{news.get('title', '')} {news.get('description', '')}".lower().split())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# Bit-array Bloom filter with double hashing. No false negatives, so a miss means "definitely new".
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate=BLOOM_FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+# Persistent record of analyzed articles (URL and content hash) in SQLite, fronted by an in-memory
+# Bloom filter so the common case, an article never seen before, costs no database lookup.
+class SeenStore:
+    def __init__(self, path=SEEN_STORE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen_articles ("
+            " url TEXT, content_hash TEXT NOT NULL, topic TEXT, analyzed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_articles_url ON seen_articles (url)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_articles_hash ON seen_articles (content_hash)")
+        self._db.commit()
+        self.lookups = 0
+        self._rebuild_bloom()
+
+    # Size the filter for four times the stored keys so it stays sparse as new articles arrive
+    def _rebuild_bloom(self):
+        rows = self._db.execute("SELECT url, content_hash FROM seen_articles").fetchall()
+        self._bloom = BloomFilter(max(BLOOM_INITIAL_CAPACITY, 4 * len(rows)))
+        for url, digest in rows:
+            self._add_keys(url, digest)
+
+    def _add_keys(self, url, digest):
+        if url:
+            self._bloom.add(f"url:{url}")
+        self._bloom.add(f"hash:{digest}")
+
+    def is_seen(self, news):
+        url = news.get("link")
+        digest = content_hash(news)
+        with self._lock:
+            if (not url or f"url:{url}" not in self._bloom) and f"hash:{digest}" not in self._bloom:
+                return False
+            self.lookups += 1
+            row = self._db.execute(
+                "SELECT 1 FROM seen_articles WHERE url = ? OR content_hash = ? LIMIT 1", (url, digest)
+            ).fetchone()
+        return row is not None
+
+    def mark_seen(self, news_items, topic=None):
+        now = time.time()
+        rows = [(news.get("link"), content_hash(news), topic, now) for news in news_items]
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO seen_articles (url, content_hash, topic, analyzed_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._db.commit()
+            for url, digest, _, _ in rows:
+                self._add_keys(url, digest)
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild_bloom()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,107 @@
+import re
+import asyncio
+import numpy as np
+
+# Lexicon-based sentiment scorer for news summaries, vectorized over a batch of texts.
+# Clear-cut summaries are labelled locally; the rest are left to the LLM.
+
+# Confidence at or above which the local label is used instead of an LLM call
+LOCAL_SENTIMENT_CONFIDENCE = 0.6
+
+# Pseudo-count added to the evidence, so one or two sentiment words are never enough on their own
+CONFIDENCE_SMOOTHING = 2.0
+
+# Summaries that finish within this many seconds of each other are scored in one batch
+SENTIMENT_BATCH_WINDOW_SECONDS = 0.05
+
+# A negator flips the polarity of the next few words ("did not improve"), up to the end of its clause
+NEGATION_WINDOW = 3
+
+POSITIVE_WORDS = {
+    "achieve": 1, "achieved": 1, "advance": 1, "agreement": 1, "approve": 1, "approved": 1, "benefit": 1,
+    "boost": 1, "boosted": 1, "breakthrough": 2, "celebrate": 2, "celebrated": 2, "gain": 1, "gains": 1,
+    "good": 1, "great": 2, "grow": 1, "growth": 1, "help": 1, "helped": 1, "hope": 1, "improve": 1,
+    "improved": 1, "improvement": 1, "innovative": 1, "optimism": 2, "optimistic": 2, "peace": 1,
+    "positive": 1, "praise": 2, "praised": 2, "profit": 1, "profits": 1, "progress": 1, "promising": 1,
+    "rally": 1, "recover": 1, "recovery": 1, "rescue": 1, "rescued": 1, "rise": 1, "rises": 1,
+    "safe": 1, "strong": 1, "stronger": 1, "succeed": 2, "success": 2, "successful": 2, "support": 1,
+    "surge": 1, "thrive": 2, "upbeat": 2, "win": 2, "wins": 2, "won": 2,
+}
+
+NEGATIVE_WORDS = {
+    "accused": 1, "attack": 2, "attacks": 2, "ban": 1, "bankrupt": 2, "bankruptcy": 2, "collapse": 2,
+    "concern": 1, "concerns": 1, "conflict": 1, "crash": 2, "crisis": 2, "criticism": 1, "criticized": 1,
+    "cut": 1, "cuts": 1, "damage": 1, "dead": 2, "death": 2, "deaths": 2, "decline": 1, "declined": 1,
+    "deficit": 1, "delay": 1, "disaster": 2, "dispute": 1, "downturn": 1, "drop": 1, "fail": 2,
+    "failed": 2, "failure": 2, "fall": 1, "fear": 1, "fears": 1, "fell": 1, "fined": 1,
+    "fraud": 2, "injured": 2, "investigation": 1, "killed": 2, "lawsuit": 1, "layoffs": 2, "loss": 1,
+    "losses": 1, "outage": 1, "plunge": 2, "protest": 1, "recession": 2, "risk": 1, "scandal": 2,
+    "shortage": 1, "slump": 2, "strike": 1, "struggle": 1, "threat": 1, "threats": 1, "tumble": 2,
+    "violence": 2, "war": 2, "warning": 1, "weak": 1, "worse": 1, "worst": 2,
+}
+
+NEGATORS = {"not", "no", "never", "without", "hardly", "nor", "cannot"}
+
+# Words, plus the punctuation that ends a clause (and with it any negation)
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'t)?|[.,;:!?()]")
+CLAUSE_BREAKS = set(".,;:!?()")
+
+VOCABULARY = {word: i for i, word in enumerate([*POSITIVE_WORDS, *NEGATIVE_WORDS])}
+WEIGHTS = np.array(
+    [*POSITIVE_WORDS.values(), *(-weight for weight in NEGATIVE_WORDS.values())], dtype=np.float32
+)
+
+def _token_ids(text):
+    ids, negated = [], []
+    window = 0
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in CLAUSE_BREAKS:
+            window = 0
+            continue
+        if token in NEGATORS or token.endswith("n't"):
+            window = NEGATION_WINDOW
+            continue
+        index = VOCABULARY.get(token)
+        if index is not None:
+            ids.append(index)
+            negated.append(window > 0)
+        window = max(0, window - 1)
+    return ids, negated
+
+# Score a batch of texts: returns a list of (label, confidence), label "positive" / "negative" / "neutral".
+# Confidence is the net polarity over the total evidence, shrunk toward 0 when there is little evidence.
+def score_sentiments(texts):
+    parsed = [_token_ids(text) for text in texts]
+    lengths = np.array([len(ids) for ids, _ in parsed], dtype=np.int64)
+    owners = np.repeat(np.arange(len(texts)), lengths)
+    ids = np.fromiter((i for text_ids, _ in parsed for i in text_ids), dtype=np.int64, count=lengths.sum())
+    signs = np.fromiter((-1.0 if n else 1.0 for _, text_negated in parsed for n in text_negated),
+                        dtype=np.float32, count=lengths.sum())
+    contributions = WEIGHTS[ids] * signs
+    net = np.bincount(owners, weights=contributions, minlength=len(texts))
+    evidence = np.bincount(owners, weights=np.abs(contributions), minlength=len(texts))
+    confidence = np.abs(net) / (evidence + CONFIDENCE_SMOOTHING)
+    labels = np.where(net > 0, "positive", np.where(net < 0, "negative", "neutral"))
+    return [(str(label), float(score)) for label, score in zip(labels, confidence)]
+
+# Collects the summaries of one analysis run as the graph produces them and scores whatever arrived
+# within `window` seconds in a single score_sentiments call. Create one per run, inside its event loop.
+class SentimentBatcher:
+    def __init__(self, window=SENTIMENT_BATCH_WINDOW_SECONDS):
+        self.window = window
+        self._pending = []  # (text, future)
+
+    async def score(self, text):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) == 1:
+            loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        results = score_sentiments([text for text, _ in pending])
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
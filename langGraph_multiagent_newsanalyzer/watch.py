@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from news_client import DEFAULT_PAGE_SIZE, NewsAPIError, fetch_news, get_news_client
+from news_agents import analyze_articles, article_text, configure_llm
+from dedup import group_near_duplicates
+from seen_store import SEEN_STORE_PATH, SeenStore
+
+# Headless topic monitoring: poll NewsAPI for each topic on a schedule and run the analysis graph
+# only on articles that were not analyzed before, appending one JSON line per new story.
+#
+#   python watch.py "AI" "climate policy" --interval 900 --output news_watch.jsonl
+
+DEFAULT_INTERVAL_SECONDS = 900
+
+async def poll_topic(topic, api_key, page_size, store, output):
+    try:
+        news_list = await asyncio.to_thread(fetch_news, api_key, topic, page_size)
+    except (NewsAPIError, OSError) as e:
+        print(f"[{topic}] fetch failed: {e}")
+        return {"new": 0, "failed": 0}
+
+    new_articles = [news for news in news_list if not store.is_seen(news)]
+    groups = group_near_duplicates([article_text(news) for news in new_articles])
+    representatives = [new_articles[group[0]] for group in groups]
+    counts = {"new": 0, "failed": 0}
+    async for i, result in analyze_articles(representatives):
+        group = [new_articles[j] for j in groups[i]]
+        # Failed stories are not marked as seen, so the next poll retries them
+        if isinstance(result, Exception):
+            print(f"[{topic}] analysis failed for {group[0]['link']}: {result}")
+            counts["failed"] += 1
+            continue
+        record = {
+            "topic": topic,
+            "analyzed_at": datetime.now(timezone.utc).isoformat(),
+            **group[0],
+            "duplicates": [news["link"] for news in group[1:]],
+            "summary": result.get("summary"),
+            "fake_news": result.get("fake_news"),
+            "sentiment": result.get("sentiment"),
+            "sentiment_source": result.get("sentiment_source"),
+        }
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        store.mark_seen(group, topic)
+        counts["new"] += 1
+    print(f"[{topic}] {len(news_list)} fetched, {len(news_list) - len(new_articles)} already seen, "
+          f"{counts['new']} new stories analyzed, {counts['failed']} failed")
+    return counts
+
+async def watch(topics, api_key, output_path, store_path=SEEN_STORE_PATH, interval=DEFAULT_INTERVAL_SECONDS,
+                page_size=DEFAULT_PAGE_SIZE, once=False):
+    store = SeenStore(store_path)
+    try:
+        with open(output_path, "a", encoding="utf-8") as output:
+            while True:
+                started = time.monotonic()
+                for topic in topics:
+                    await poll_topic(topic, api_key, page_size, store, output)
+                if once:
+                    return
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll NewsAPI topics and analyze only articles not seen before.")
+    parser.add_argument("topics", nargs="+", help="Topics to monitor")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS, help="Seconds between polls")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Articles fetched per topic and poll")
+    parser.add_argument("--output", default="news_watch.jsonl", help="JSONL file analyses are appended to")
+    parser.add_argument("--store", default=SEEN_STORE_PATH, help="SQLite file recording analyzed articles")
+    parser.add_argument("--once", action="store_true", help="Poll every topic once and exit")
+    args = parser.parse_args()
+
+    load_dotenv()
+    configure_llm(os.getenv("OPENAI_API_KEY"))
+    api_key = os.getenv("NEWS_API_KEY")
+    # Every poll should reach the API (revalidating when it can) rather than reuse the app's cached result
+    get_news_client(api_key).ttl = 0
+    try:
+        asyncio.run(watch(args.topics, api_key, args.output, args.store, args.interval, args.page_size, args.once))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()